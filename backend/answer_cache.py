@@ -0,0 +1,179 @@
+"""
+Persistent answer cache shared by all uvicorn workers
+
+Answers are stored in a SQLite database (WAL mode) under the persist
+directory, keyed by collection, content version and normalized question,
+so they survive restarts/deploys and are shared between worker processes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Configuration
+PERSIST_DIRECTORY = os.getenv("PERSIST_DIRECTORY", str(Path(__file__).parent.parent / "chroma_db"))
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", str(Path(PERSIST_DIRECTORY) / "answer_cache.sqlite3"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "0"))  # seconds, 0 = until content changes
+PREWARM_QUESTIONS_FILE = os.getenv(
+    "PREWARM_QUESTIONS_FILE", str(Path(__file__).parent.parent / "data" / "top_questions.json")
+)
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip("?!. ")
+
+
+def compute_content_version(content_dir: Path, extra: str = "") -> str:
+    """Hash of a collection's content files, so edits invalidate cached answers"""
+    digest = hashlib.sha256(extra.encode("utf-8"))
+    for json_file in sorted(content_dir.glob("*.json")):
+        digest.update(json_file.name.encode("utf-8"))
+        digest.update(json_file.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def load_prewarm_questions(path: str = PREWARM_QUESTIONS_FILE) -> list[str]:
+    """Load the list of top questions used to pre-warm the cache"""
+    try:
+        with open(path, "r", encoding="utf-8") as file_handle:
+            data = json.load(file_handle)
+    except (OSError, ValueError):
+        return []
+    questions = data.get("questions", []) if isinstance(data, dict) else data
+    return [q for q in questions if isinstance(q, str) and q.strip()]
+
+
+class AnswerCache:
+    """SQLite-backed answer store; one connection per thread"""
+
+    def __init__(self, path: str = ANSWER_CACHE_PATH,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 ttl: float = ANSWER_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self._local = threading.local()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS answers (
+                    key TEXT PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_created_at ON answers (created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            # WAL lets readers in every worker proceed while one worker writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(collection: str, content_version: str, question: str) -> str:
+        raw = f"{collection}\0{content_version}\0{normalize_question(question)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, collection: str, content_version: str, question: str):
+        """Return the cached result dict, or None"""
+        key = self.make_key(collection, content_version, question)
+        try:
+            row = self._connection().execute(
+                "SELECT result, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Answer cache read failed: {e}")
+            return None
+
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, collection: str, content_version: str, question: str, result: dict):
+        key = self.make_key(collection, content_version, question)
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, collection, question, result, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, collection, normalize_question(question), json.dumps(result), time.time()),
+                )
+            self.writes += 1
+            if self.writes % 100 == 0:
+                self.prune()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Answer cache write failed: {e}")
+
+    def prune(self):
+        """Drop expired entries and keep at most max_entries (oldest first)"""
+        with self._connection() as conn:
+            if self.ttl:
+                conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def metrics(self) -> dict:
+        try:
+            entries = self._connection().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "writes": self.writes,
+            "errors": self.errors,
+        }
+
+
+# Singleton instance
+_answer_cache = None
+
+
+def get_answer_cache():
+    """Get or create the answer cache singleton (None when disabled or unavailable)"""
+    global _answer_cache
+    if _answer_cache is None and ANSWER_CACHE_ENABLED:
+        try:
+            _answer_cache = AnswerCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠ Answer cache not available: {e}")
+            return None
+    return _answer_cache
@@ -0,0 +1,296 @@
+"""
+Retrieval scale and quality evaluation harness
+
+Generates synthetic content in the knowledge-base JSON schemas (sections,
+tiers, questions, studies) with planted facts, builds each retrieval
+backend over it, and measures index build time, index size, query latency
+and recall@k against the planted ground truth.
+
+Usage:
+    python eval_retrieval.py --sizes 1000,10000,100000 --queries 200
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from keyword_index import KeywordIndex, ShardedKeywordIndex, KEYWORD_SHARDS, tokenize
+from memory_watchdog import get_rss_mb
+
+CONTENT_DIR = Path(__file__).parent.parent / "data" / "content"
+TOP_K = 4
+SYLLABLES = ["ka", "lo", "vex", "tar", "zun", "mi", "dro", "pel", "qua", "ris"]
+TOPICS = ["data migration", "fraud detection", "chatbot rollout", "demand forecasting",
+          "model monitoring", "document search", "onboarding automation", "churn prediction"]
+
+# (source file stem, page name, list key) per schema, in generation order
+SCHEMAS = [
+    ("synthetic_sections", "Synthetic Services", "sections"),
+    ("synthetic_pricing", "Synthetic Pricing", "sections"),
+    ("synthetic_faq", "Synthetic FAQ", "questions"),
+    ("synthetic_case_studies", "Synthetic Case Studies", "studies"),
+]
+QUERY_TEMPLATES = [
+    "Tell me about {topic} for {entity}",
+    "How much does the {entity} package cost?",
+    "Is {topic} supported for {entity}?",
+    "What results did {entity} see from {topic}?",
+]
+
+
+def build_vocabulary() -> list[str]:
+    """Filler vocabulary taken from the real content so text looks realistic"""
+    words = set()
+    for json_file in CONTENT_DIR.glob("*.json"):
+        words.update(re.findall(r"[a-z]+", json_file.read_text(encoding="utf-8").lower()))
+    return sorted(w for w in words if len(w) > 2)
+
+
+def make_entity(rng: random.Random, index: int) -> str:
+    """Unique, single-token name used to plant a fact"""
+    return "".join(rng.choice(SYLLABLES) for _ in range(2)) + str(index)
+
+
+def _filler(rng: random.Random, vocab: list[str], words: int) -> str:
+    return " ".join(rng.choices(vocab, k=words)).capitalize() + "."
+
+
+def _write_json_stream(path: Path, page: str, key: str, items):
+    """Write {"page": ..., key: [...]} one item at a time to keep memory flat"""
+    with open(path, "w", encoding="utf-8") as file_handle:
+        file_handle.write(f'{{"page": {json.dumps(page)}, {json.dumps(key)}: [')
+        for i, item in enumerate(items):
+            file_handle.write(("," if i else "") + "\n" + json.dumps(item))
+        file_handle.write("\n]}\n")
+
+
+def generate_corpus(num_docs: int, out_dir: Path, num_queries: int, seed: int = 0) -> list[dict]:
+    """Write a synthetic corpus to out_dir and return the planted queries
+
+    Documents are split evenly across the four schemas. num_queries of them
+    carry a planted fact about a unique entity; each returned query records
+    the (source, label) of the document that answers it.
+    """
+    rng = random.Random(seed)
+    vocab = build_vocabulary()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    per_schema = [num_docs // 4 + (1 if i < num_docs % 4 else 0) for i in range(4)]
+    planted = set(rng.sample(range(num_docs), min(num_queries, num_docs)))
+    queries = []
+
+    def items(schema: int, count: int, start: int):
+        for i in range(count):
+            doc_index = start + i
+            topic = rng.choice(TOPICS)
+            text = _filler(rng, vocab, 40)
+            entity = make_entity(rng, doc_index) if doc_index in planted else None
+
+            if schema == 0:
+                label = f"{topic.title()} for {entity}" if entity else f"{topic.title()} {doc_index}"
+                content = f"{text} {entity} relies on our {topic} practice." if entity else text
+                item = {"title": label, "content": content}
+            elif schema == 1:
+                label = f"{entity} Package" if entity else f"Tier {doc_index}"
+                item = {"tier": label, "price": f"${rng.randint(1, 500)},000",
+                        "description": text, "includes": f"{topic}, {_filler(rng, vocab, 8)}"}
+            elif schema == 2:
+                label = f"Does {entity} support {topic}?" if entity else f"{_filler(rng, vocab, 8)[:-1]}?"
+                item = {"question": label, "answer": text}
+            else:
+                label = f"{entity} Corp" if entity else f"Client {doc_index}"
+                item = {"client": label, "challenge": text,
+                        "solution": f"We delivered {topic}. {_filler(rng, vocab, 15)}",
+                        "results": _filler(rng, vocab, 15)}
+
+            if entity:
+                # Queries paraphrase the planted fact rather than quoting it
+                query = QUERY_TEMPLATES[schema].format(entity=entity, topic=topic)
+                queries.append({"query": query, "source": SCHEMAS[schema][0], "label": label})
+            yield item
+
+    start = 0
+    for schema, count in enumerate(per_schema):
+        source, page, key = SCHEMAS[schema]
+        _write_json_stream(out_dir / f"{source}.json", page, key, items(schema, count, start))
+        start += count
+
+    rng.shuffle(queries)
+    return queries
+
+
+def doc_key(doc) -> tuple:
+    """(source, label) identifying a document, for dicts and langchain Documents"""
+    metadata = doc.metadata if hasattr(doc, "metadata") else doc["metadata"]
+    label = metadata.get("section") or metadata.get("question") or metadata.get("client")
+    return metadata.get("source"), label
+
+
+def directory_size_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1024 / 1024
+
+
+class KeywordBackend:
+    name = "keyword"
+
+    def build(self, content_dir: Path):
+        from rag_system import load_documents_from_content_dir
+        documents = load_documents_from_content_dir(content_dir)
+        self.index = KeywordIndex(documents)
+
+    def search(self, query: str):
+        return self.index.search(tokenize(query), TOP_K)
+
+    def disk_mb(self):
+        return None
+
+    def close(self):
+        self.index.close()
+
+
+class ShardedKeywordBackend(KeywordBackend):
+    name = f"keyword-sharded x{KEYWORD_SHARDS}"
+
+    def build(self, content_dir: Path):
+        from rag_system import load_documents_from_content_dir
+        documents = load_documents_from_content_dir(content_dir)
+        self.index = ShardedKeywordIndex(documents, KEYWORD_SHARDS)
+
+
+class ChromaBackend:
+    name = "chroma"
+
+    def build(self, content_dir: Path):
+        self.persist_dir = Path(tempfile.mkdtemp(prefix="eval_chroma_"))
+        os.environ["PERSIST_DIRECTORY"] = str(self.persist_dir)
+        import ingest_data
+        ingest_data.PERSIST_DIRECTORY = str(self.persist_dir)
+        ingest_data.ingest_to_chromadb(sorted(content_dir.glob("*.json")), "eval_synthetic")
+
+        # Queries must be embedded with the same model used for ingestion
+        from langchain_huggingface import HuggingFaceEmbeddings
+        from langchain_community.vectorstores import Chroma
+        self.store = Chroma(
+            persist_directory=str(self.persist_dir),
+            collection_name="eval_synthetic",
+            embedding_function=HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"),
+        )
+
+    def search(self, query: str):
+        return self.store.similarity_search(query, k=TOP_K)
+
+    def disk_mb(self):
+        return directory_size_mb(self.persist_dir)
+
+    def close(self):
+        shutil.rmtree(self.persist_dir, ignore_errors=True)
+
+
+def evaluate(backend, content_dir: Path, queries: list[dict]) -> dict:
+    """Build a backend, run the queries and collect size, latency and recall
+
+    index_mb is the RSS growth of this process and its workers during the
+    build, measured the same way for every backend (for chroma it includes
+    loading the embedding model).
+    """
+    gc.collect()
+    rss_before = get_rss_mb()
+    started = time.perf_counter()
+    backend.build(content_dir)
+    build_s = time.perf_counter() - started
+    index_mb = max(get_rss_mb() - rss_before, 0.0)
+
+    latencies, found = [], 0
+    for q in queries:
+        started = time.perf_counter()
+        results = backend.search(q["query"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        found += (q["source"], q["label"]) in {doc_key(doc) for doc in results}
+
+    latencies.sort()
+    return {
+        "build_s": build_s,
+        "index_mb": index_mb,
+        "disk_mb": backend.disk_mb(),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        f"recall@{TOP_K}": found / len(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval backends on synthetic corpora")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated corpus sizes (documents)")
+    parser.add_argument("--queries", type=int, default=200, help="planted queries per corpus")
+    parser.add_argument("--backends", default="keyword,keyword-sharded,chroma")
+    parser.add_argument("--max-vector-docs", type=int, default=10000,
+                        help="skip the chroma backend above this size (embedding is slow)")
+    parser.add_argument("--output", default="eval_results.md", help="markdown results table")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    wanted = set(args.backends.split(","))
+    rows = []
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="eval_corpus_") as tmp:
+            content_dir = Path(tmp)
+            print(f"\n{'='*60}\nGenerating {size} synthetic documents...")
+            queries = generate_corpus(size, content_dir, args.queries, args.seed)
+
+            backends = []
+            if "keyword" in wanted:
+                backends.append(KeywordBackend())
+            if "keyword-sharded" in wanted and KEYWORD_SHARDS > 1:
+                backends.append(ShardedKeywordBackend())
+            if "chroma" in wanted:
+                if size > args.max_vector_docs:
+                    print(f"Skipping chroma at {size} documents (--max-vector-docs {args.max_vector_docs})")
+                else:
+                    backends.append(ChromaBackend())
+
+            for backend in backends:
+                print(f"Evaluating {backend.name}...")
+                try:
+                    result = evaluate(backend, content_dir, queries)
+                except Exception as e:
+                    # One unavailable backend (missing package, model download) shouldn't lose the table
+                    print(f"⚠ Skipping {backend.name}: {e}")
+                    continue
+                finally:
+                    try:
+                        backend.close()
+                    except AttributeError:
+                        pass
+                rows.append({"docs": size, "backend": backend.name, **result})
+                print(f"  {result}")
+
+    if not rows:
+        print("No results.")
+        return
+
+    headers = list(rows[0].keys())
+    table = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    for row in rows:
+        cells = [f"{v:.3f}" if isinstance(v, float) else "-" if v is None else str(v) for v in row.values()]
+        table.append("| " + " | ".join(cells) + " |")
+
+    Path(args.output).write_text("\n".join(table) + "\n", encoding="utf-8")
+    print("\n" + "\n".join(table))
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,14 @@ Loads content from JSON files, chunks text, generates embeddings, and stores in
 
 import os
 import json
-import shutil
+import sys
+import queue
+import itertools
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -69,6 +76,13 @@ COLLECTION_NAME = sanitize_collection_name(COLLECTION_NAME_RAW)
 # Paths
 CONTENT_DIR = Path(__file__).parent.parent / "data" / "content"
 
+# Pipeline tuning
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "256"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))  # batches buffered between stages
+PROGRESS_INTERVAL = 2.0  # seconds
+
 def load_json_content(file_path: Path) -> dict:
     """Load content from a JSON file"""
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -126,74 +140,182 @@ def extract_documents_from_json(data: dict, source_file: str) -> list[Document]:
 
     return documents
 
-def load_all_content() -> list[Document]:
-    """Load all JSON content files from data/content directory"""
-    all_documents = []
-
-    json_files = list(CONTENT_DIR.glob("*.json"))
-    print(f"Found {len(json_files)} JSON files to process")
-
-    for json_file in json_files:
-        print(f"Loading: {json_file.name}")
-        data = load_json_content(json_file)
-        source_name = json_file.stem  # filename without extension
-        documents = extract_documents_from_json(data, source_name)
-        all_documents.extend(documents)
-        print(f"  Extracted {len(documents)} documents from {json_file.name}")
-
-    return all_documents
-
-def chunk_documents(documents: list[Document]) -> list[Document]:
-    """Split documents into smaller chunks for better retrieval"""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,  # ~250 tokens
-        chunk_overlap=200,  # Overlap to maintain context
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-
-    chunked_docs = text_splitter.split_documents(documents)
-    print(f"Split {len(documents)} documents into {len(chunked_docs)} chunks")
-
-    return chunked_docs
-
-def ingest_to_chromadb(documents: list[Document]):
-    """Ingest documents into ChromaDB with embeddings"""
+_text_splitter = None
+
+def _get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Text splitter shared by all calls in this process (one per worker)"""
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,  # ~250 tokens
+            chunk_overlap=200,  # Overlap to maintain context
+            length_function=len,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+    return _text_splitter
+
+def load_and_chunk_file(json_file: Path) -> list[Document]:
+    """Load a single JSON file and split it into chunks (runs in a worker process)"""
+    data = load_json_content(json_file)
+    documents = extract_documents_from_json(data, json_file.stem)
+    return _get_text_splitter().split_documents(documents)
+
+def iter_chunks(json_files: list[Path], workers: int = INGEST_WORKERS):
+    """Load and chunk files in a process pool, yielding chunks as files complete
+
+    At most ``2 * workers`` files are in flight, so memory is bounded by a
+    handful of files rather than the whole corpus.
+    """
+    files = iter(json_files)
+    # spawn, not fork: the parent already runs embedding threads
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = {pool.submit(load_and_chunk_file, f) for f in itertools.islice(files, workers * 2)}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for json_file in itertools.islice(files, 1):
+                    pending.add(pool.submit(load_and_chunk_file, json_file))
+                yield from future.result()
+
+def _batched(items, batch_size: int):
+    """Group an iterable into lists of at most batch_size"""
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+class _Stage(threading.Thread):
+    """Pipeline stage feeding a bounded queue from an iterable or an upstream queue"""
+
+    def __init__(self, name: str, source, target: queue.Queue, stop: threading.Event, work=None):
+        super().__init__(name=name, daemon=True)
+        self.source = source
+        self.target = target
+        self.stop = stop
+        self.work = work
+        self.error = None
+
+    def run(self):
+        upstream = isinstance(self.source, queue.Queue)
+        exhausted = False  # upstream's _DONE already consumed
+        try:
+            for item in (iter(self.source.get, _DONE) if upstream else self.source):
+                if self.stop.is_set():
+                    break
+                self.target.put(item if self.work is None else self.work(item))
+            else:
+                exhausted = True
+        except BaseException as e:
+            self.error = e
+            self.stop.set()
+        finally:
+            # Stopped early: unblock the upstream stage so it can see the stop flag and exit
+            if upstream and not exhausted:
+                for _ in iter(self.source.get, _DONE):
+                    pass
+            self.target.put(_DONE)
+
+def ingest_to_chromadb(json_files: list[Path], collection_name: str = COLLECTION_NAME,
+                       workers: int = INGEST_WORKERS,
+                       embed_batch_size: int = EMBED_BATCH_SIZE,
+                       write_batch_size: int = WRITE_BATCH_SIZE):
+    """Stream files through load/chunk -> embed -> write stages into ChromaDB
+
+    Stages are connected by bounded queues so only a few batches are held in
+    memory at once, regardless of corpus size.
+    """
     print(f"\nConnecting to ChromaDB at {PERSIST_DIRECTORY}...")
 
     # Create persist directory if it doesn't exist
     persist_path = Path(PERSIST_DIRECTORY)
     persist_path.mkdir(parents=True, exist_ok=True)
 
-    # Clear existing data by deleting the directory (optional - comment out if you want to keep existing data)
-    print(f"Clearing existing data from {PERSIST_DIRECTORY}...")
-    if persist_path.exists():
-        shutil.rmtree(persist_path)
-        persist_path.mkdir(parents=True, exist_ok=True)
-
     # Initialize embeddings model
     print("Initializing HuggingFace embeddings model...")
     embeddings = HuggingFaceEmbeddings(
         model_name="sentence-transformers/all-MiniLM-L6-v2"
     )
 
-    # Create vector store and add documents
-    print(f"Generating embeddings and storing {len(documents)} documents...")
-    print("This may take a few minutes depending on the amount of content...\n")
+    # Clear existing data for this collection only; other collections in the
+    # persist directory are served alongside it
+    print(f"Clearing existing data from collection '{collection_name}'...")
+    Chroma(persist_directory=PERSIST_DIRECTORY, collection_name=collection_name).delete_collection()
 
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
+    vector_store = Chroma(
         persist_directory=PERSIST_DIRECTORY,
-        collection_name=COLLECTION_NAME
+        collection_name=collection_name,
+        embedding_function=embeddings
     )
-
-    print(f"✅ Successfully ingested {len(documents)} documents into ChromaDB!")
+    collection = vector_store._collection
+
+    print(f"Streaming {len(json_files)} files with {workers} workers "
+          f"(embed batch {embed_batch_size}, write batch {write_batch_size})...\n")
+
+    def embed(batch: list[Document]):
+        vectors = embeddings.embed_documents([doc.page_content for doc in batch])
+        return batch, vectors
+
+    stop = threading.Event()
+    chunk_queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    embedded_queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    stages = [
+        _Stage("chunker", _batched(iter_chunks(json_files, workers), embed_batch_size), chunk_queue, stop),
+        _Stage("embedder", chunk_queue, embedded_queue, stop, work=embed),
+    ]
+    for stage in stages:
+        stage.start()
+
+    # Writer stage runs on the main thread
+    written = 0
+    started = last_report = time.perf_counter()
+    ids, vectors, texts, metadatas = [], [], [], []
+
+    def flush():
+        nonlocal written
+        if ids:
+            collection.add(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+            written += len(ids)
+            ids.clear()
+            vectors.clear()
+            texts.clear()
+            metadatas.clear()
+
+    try:
+        for batch, batch_vectors in iter(embedded_queue.get, _DONE):
+            for doc, vector in zip(batch, batch_vectors):
+                ids.append(str(uuid.uuid4()))
+                vectors.append(vector)
+                texts.append(doc.page_content)
+                metadatas.append(doc.metadata)
+            if len(ids) >= write_batch_size:
+                flush()
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                print(f"   {written} chunks written ({written / (now - started):.1f} chunks/s)")
+                last_report = now
+        flush()
+    except BaseException:
+        stop.set()  # let the chunker and embedder wind down
+        raise
+
+    for stage in stages:
+        stage.join()
+        if stage.error is not None:
+            raise RuntimeError(f"Ingestion stage '{stage.name}' failed") from stage.error
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Successfully ingested {written} chunks into ChromaDB "
+          f"in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.1f} chunks/s)!")
     print(f"   Persist Directory: {PERSIST_DIRECTORY}")
-    print(f"   Collection: {COLLECTION_NAME}")
+    print(f"   Collection: {collection_name}")
 
     # Verify data
-    doc_count = vector_store._collection.count()
+    doc_count = collection.count()
     print(f"\n📊 Total documents in collection: {doc_count}")
 
     # Show sample document
@@ -205,25 +327,31 @@ def ingest_to_chromadb(documents: list[Document]):
             print(f"   - text: {sample.page_content[:100]}...")
             print(f"   - metadata: {sample.metadata}")
 
-def main():
-    """Main ingestion pipeline"""
+    return written
+
+def main(collection: str = None):
+    """Main ingestion pipeline
+
+    With no collection, ingests data/content/*.json into COLLECTION_NAME.
+    Otherwise ingests data/content/<collection>/*.json into that collection;
+    the directory keeps the name as given, while the ChromaDB collection uses
+    the sanitized name (e.g. "en" -> "en0"), matching how the backend serves it.
+    """
+    collection_name = sanitize_collection_name(collection) if collection else COLLECTION_NAME
+    content_dir = CONTENT_DIR / collection if collection else CONTENT_DIR
+
     print("=" * 60)
     print("ChromaDB RAG - Data Ingestion Script")
     print("=" * 60)
 
-    # Step 1: Load all content
-    print("\n📁 Step 1: Loading content from JSON files...")
-    documents = load_all_content()
-    print(f"✅ Loaded {len(documents)} documents")
-
-    # Step 2: Chunk documents
-    print("\n✂️  Step 2: Chunking documents...")
-    chunked_docs = chunk_documents(documents)
-    print(f"✅ Created {len(chunked_docs)} chunks")
+    # Step 1: Discover content
+    print(f"\n📁 Step 1: Discovering JSON content files in {content_dir}...")
+    json_files = sorted(content_dir.glob("*.json"))
+    print(f"✅ Found {len(json_files)} JSON files to process")
 
-    # Step 3: Ingest to ChromaDB
-    print("\n🚀 Step 3: Ingesting to ChromaDB with embeddings...")
-    ingest_to_chromadb(chunked_docs)
+    # Step 2: Load, chunk, embed and store in one streaming pass
+    print("\n🚀 Step 2: Streaming load → chunk → embed → ChromaDB...")
+    ingest_to_chromadb(json_files, collection_name)
 
     print("\n" + "=" * 60)
     print("✅ Data ingestion complete!")
@@ -234,4 +362,5 @@ def main():
     print("3. Test the chatbot!")
 
 if __name__ == "__main__":
-    main()
+    # Optional collection name: python ingest_data.py [collection]
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,266 @@
+"""
+Keyword retrieval indexes for the fallback (non-vector) tier
+
+Scores documents by the number of distinct query tokens they contain, the
+same scoring the original linear scan used, but from a precomputed inverted
+index. Large corpora are split into shards scored in parallel by one worker
+process per shard; per-shard top-k results are merged in the parent.
+"""
+
+import heapq
+import multiprocessing
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+# Configuration
+# os.cpu_count() reports the host's CPUs inside a container; count the ones we may run on
+_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+KEYWORD_SHARD_MAX = int(os.getenv("KEYWORD_SHARD_MAX", "4"))  # each shard is a whole Python interpreter
+KEYWORD_SHARDS = int(os.getenv("KEYWORD_SHARDS", str(max(min(_CPUS, KEYWORD_SHARD_MAX), 1))))
+KEYWORD_SHARD_MIN_DOCS = int(os.getenv("KEYWORD_SHARD_MIN_DOCS", "50000"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> set:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def _build_postings(token_sets) -> dict:
+    """token -> list of local document indices, in document order"""
+    postings = {}
+    for index, tokens in enumerate(token_sets):
+        for token in tokens:
+            postings.setdefault(token, []).append(index)
+    return postings
+
+
+def _postings_bytes(postings: dict, num_docs: int) -> int:
+    """Approximate memory held by a postings dict (tokens, lists and index ints)"""
+    size = sys.getsizeof(postings) + 28 * num_docs  # one int object per document index
+    for token, indices in postings.items():
+        size += sys.getsizeof(token) + sys.getsizeof(indices)
+    return size
+
+
+def _top_k(postings: dict, query_tokens, top_k: int, offset: int = 0) -> list:
+    """Top-k (score, doc index) by token overlap; ties keep document order"""
+    scores = Counter()
+    for token in query_tokens:
+        scores.update(postings.get(token, ()))
+    best = heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, index + offset) for index, score in best]
+
+
+def _frequencies(postings: dict, tokens) -> dict:
+    """token -> number of documents containing it"""
+    return {token: len(postings.get(token, ())) for token in tokens}
+
+
+class KeywordIndex:
+    """In-process inverted index"""
+
+    def __init__(self, documents: list):
+        self.documents = documents
+        self._postings = _build_postings(tokenize(doc["page_content"]) for doc in documents)
+        self.memory_bytes = _postings_bytes(self._postings, len(documents))
+
+    def search(self, query_tokens, top_k: int = 4) -> list:
+        return [self.documents[index] for _, index in _top_k(self._postings, query_tokens, top_k)]
+
+    def document_frequencies(self, tokens) -> dict:
+        return _frequencies(self._postings, tokens)
+
+    def close(self):
+        pass
+
+
+# Worker-side state: each worker process owns exactly one shard
+_worker_postings = None
+
+
+def _load_shard(shm_name: str, size: int):
+    """Worker initializer: read the shard's tokens from shared memory once"""
+    global _worker_postings
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        payload = bytes(shm.buf[:size]).decode("utf-8")
+    finally:
+        shm.close()
+    _worker_postings = _build_postings(line.split() for line in payload.split("\n"))
+
+
+def _call_shard(function, *args):
+    """Run one of the postings functions above against this worker's shard"""
+    return function(_worker_postings, *args)
+
+
+class ShardedKeywordIndex:
+    """Inverted index split across worker processes, one shard per worker
+
+    Each shard's tokenized documents are handed to its worker through a
+    shared memory segment, which is unlinked as soon as the worker has built
+    its postings, so the workers' postings are the only copy. Queries only
+    send the query tokens and receive (score, index) pairs back. A worker
+    that dies (e.g. OOM-killed) is respawned on the next query; if that
+    fails, its shard is scored in-process from then on.
+    """
+
+    def __init__(self, documents: list, shards: int = KEYWORD_SHARDS):
+        self.documents = documents
+        self._shard_size = -(-len(documents) // shards)  # ceiling division
+        self._offsets = list(range(0, len(documents), self._shard_size))  # first document of each shard
+        self._executors = [None] * len(self._offsets)
+        self._local = {}  # shard -> in-process postings, once its worker can't be respawned
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self.respawns = 0
+        self.memory_bytes = sum(self._spawn(range(len(self._offsets))))  # postings held by the workers
+
+    def _shard_documents(self, shard: int) -> list:
+        offset = self._offsets[shard]
+        return self.documents[offset:offset + self._shard_size]
+
+    def _spawn(self, shards) -> list:
+        """Start one worker per shard and wait until all have built their postings
+
+        Returns each worker's postings size in bytes.
+        """
+        segments, started = [], []
+        try:
+            for shard in shards:
+                documents = self._shard_documents(shard)
+                payload = "\n".join(" ".join(tokenize(doc["page_content"])) for doc in documents).encode("utf-8")
+
+                segment = shared_memory.SharedMemory(create=True, size=max(len(payload), 1))
+                segments.append(segment)
+                segment.buf[:len(payload)] = payload
+
+                executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=self._context,
+                    initializer=_load_shard, initargs=(segment.name, len(payload)),
+                )
+                started.append((shard, executor, len(documents)))
+
+            # Start every worker now so shards load in parallel, not on the first query
+            futures = [executor.submit(_call_shard, _postings_bytes, num_docs) for _, executor, num_docs in started]
+            sizes = [future.result() for future in futures]
+        except BaseException:
+            for _, executor, _ in started:
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            # Workers hold their own postings now; the token payloads are no longer needed
+            for segment in segments:
+                segment.close()
+                try:
+                    segment.unlink()
+                except FileNotFoundError:
+                    pass
+
+        for shard, executor, _ in started:
+            self._executors[shard] = executor
+        return sizes
+
+    def _submit(self, shard: int, function, args: tuple):
+        """(executor, future) for a shard call; future is None when the worker is unavailable"""
+        executor = self._executors[shard]
+        if executor is None:
+            return None, None
+        try:
+            return executor, executor.submit(_call_shard, function, *args)
+        except BrokenProcessPool:
+            return executor, None
+
+    def _recover(self, shard: int, broken, function, args: tuple):
+        """Run a call on a shard whose worker died: respawn it, or fall back to in-process postings"""
+        with self._lock:
+            # Another query may already have replaced this executor
+            if self._executors[shard] is broken and shard not in self._local:
+                if broken is not None:
+                    # Waiting is quick for a broken pool, and leaving its manager thread
+                    # behind makes concurrent.futures fail on its wakeup pipe at exit
+                    broken.shutdown(wait=True, cancel_futures=True)
+                self._executors[shard] = None
+                print(f"⚠ Keyword shard {shard} worker died, respawning")
+                try:
+                    self._spawn([shard])
+                    self.respawns += 1
+                except (OSError, ValueError, RuntimeError) as e:
+                    print(f"⚠ Keyword shard {shard} could not be respawned ({e}), scoring it in-process")
+                    self._use_local(shard)
+
+        if shard not in self._local:
+            executor, future = self._submit(shard, function, args)
+            try:
+                if future is not None:
+                    return future.result()
+            except BrokenProcessPool:
+                pass
+            # The respawned worker died straight away; stop relying on a worker for this shard
+            with self._lock:
+                self._use_local(shard)
+        return function(self._local[shard], *args)
+
+    def _map_shards(self, function, args_for) -> list:
+        """Call function(postings, *args_for(shard)) on every shard in parallel"""
+        pending = [(shard, *self._submit(shard, function, args_for(shard))) for shard in range(len(self._offsets))]
+
+        results = []
+        for shard, executor, future in pending:
+            try:
+                if future is not None:
+                    results.append(future.result())
+                    continue
+            except BrokenProcessPool:
+                pass
+            results.append(self._recover(shard, executor, function, args_for(shard)))
+        return results
+
+    def _use_local(self, shard: int):
+        if shard not in self._local:
+            executor = self._executors[shard]
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)  # broken, see _recover
+            self._executors[shard] = None
+            self._local[shard] = _build_postings(tokenize(doc["page_content"]) for doc in self._shard_documents(shard))
+
+    def search(self, query_tokens, top_k: int = 4) -> list:
+        query_tokens = list(query_tokens)
+        hits = self._map_shards(_top_k, lambda shard: (query_tokens, top_k, self._offsets[shard]))
+        merged = heapq.nsmallest(top_k, (hit for shard_hits in hits for hit in shard_hits),
+                                 key=lambda hit: (-hit[0], hit[1]))
+        return [self.documents[index] for _, index in merged]
+
+    def document_frequencies(self, tokens) -> dict:
+        tokens = list(tokens)
+        totals = dict.fromkeys(tokens, 0)
+        for frequencies in self._map_shards(_frequencies, lambda shard: (tokens,)):
+            for token, count in frequencies.items():
+                totals[token] += count
+        return totals
+
+    def close(self):
+        with self._lock:
+            for executor in self._executors:
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+            self._executors = [None] * len(self._offsets)
+            self._local.clear()
+
+
+def build_keyword_index(documents: list, shards: int = KEYWORD_SHARDS,
+                        min_docs: int = KEYWORD_SHARD_MIN_DOCS):
+    """Shard across processes only when the corpus is large enough to benefit"""
+    if shards > 1 and len(documents) >= min_docs:
+        try:
+            return ShardedKeywordIndex(documents, shards)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Sharded keyword index unavailable ({e}), using single process")
+    return KeywordIndex(documents)
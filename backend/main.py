@@ -2,10 +2,26 @@
 FastAPI Server for ChromaDB RAG Chatbot
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from rag_system import get_rag_system
+from startup_profile import get_startup_profile
+
+profile = get_startup_profile()
+
+with profile.phase("import fastapi"):
+    from fastapi import FastAPI, HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from pydantic import BaseModel
+
+with profile.phase("import rag_system"):
+    from rag_system import get_rag_system, get_collection_registry
+    from answer_cache import get_answer_cache, load_prewarm_questions
+
+from memory_watchdog import (
+    get_memory_watchdog,
+    SHRINK_CACHES, SHED_HEAVY_WORK, KEYWORD_ONLY,
+    SHRINK_CACHES_PCT, SHED_HEAVY_WORK_PCT, KEYWORD_ONLY_PCT,
+)
+from typing import Optional
+import asyncio
 import logging
 
 # Configure logging
@@ -31,11 +47,15 @@ app.add_middleware(
 # Request/Response models
 class ChatRequest(BaseModel):
     question: str
+    collection: Optional[str] = None  # knowledge base / tenant; default collection if omitted
+    session_id: Optional[str] = None  # conversation ID; enables follow-up questions
 
     class Config:
         json_schema_extra = {
             "example": {
-                "question": "What AI services do you offer?"
+                "question": "What AI services do you offer?",
+                "collection": "website_content",
+                "session_id": "3f2b9c1e-visitor"
             }
         }
 
@@ -59,19 +79,39 @@ async def startup_event():
     """Initialize RAG system when server starts"""
     logger.info("Starting up FastAPI server...")
     try:
-        get_rag_system()
+        with profile.phase("init rag_system"):
+            get_rag_system()
         logger.info("✅ RAG system initialized successfully")
     except Exception as e:
         logger.error(f"❌ Failed to initialize RAG system: {e}")
         raise
 
+    # Degrade gracefully under memory pressure instead of hitting the OOM killer
+    registry = get_collection_registry()
+    watchdog = get_memory_watchdog()
+    watchdog.add_step(SHRINK_CACHES, SHRINK_CACHES_PCT, registry.shrink_caches, registry.restore_caches)
+    watchdog.add_step(SHED_HEAVY_WORK, SHED_HEAVY_WORK_PCT, lambda: None, lambda: None)
+    watchdog.add_step(KEYWORD_ONLY, KEYWORD_ONLY_PCT, registry.unload_vector_stores, registry.reload_vector_stores)
+    watchdog.start()
+
+    # Pre-warm the shared answer cache in the background; yields under memory pressure
+    questions = load_prewarm_questions()
+    if questions and get_answer_cache() is not None:
+        logger.info(f"Pre-warming answer cache with {len(questions)} questions...")
+        asyncio.get_running_loop().run_in_executor(
+            None, get_rag_system().prewarm, questions, watchdog.accepting_heavy_work
+        )
+
+    profile.finish()
+    logger.info(f"Startup profile:\n{profile.report()}")
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown"""
     logger.info("Shutting down FastAPI server...")
-    rag = get_rag_system()
-    rag.close()
+    await get_memory_watchdog().stop()
+    get_collection_registry().close()
     logger.info("✅ Resources cleaned up")
 
 
@@ -84,11 +124,24 @@ async def root():
         "message": " AI Chatbot API is running",
         "version": "1.0.0"
     }
-    
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Runtime metrics: memory usage, degradation steps, startup profile and collections"""
+    return {
+        "memory": get_memory_watchdog().metrics(),
+        "startup": profile.as_dict(),
+        "retrieval": get_collection_registry().metrics(),
+        "answer_cache": cache.metrics() if (cache := get_answer_cache()) is not None else None,
+    }
+
     
 
+# Plain def: FastAPI runs it in its threadpool, so loading a collection on first
+# use (ChromaDB, embedding model, keyword index) doesn't stall the event loop
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+def chat(request: ChatRequest):
     try:
         logger.info(f"Received question: {request.question}")
 
@@ -98,9 +151,17 @@ async def chat(request: ChatRequest):
 
         if len(request.question) > 500:
             raise HTTPException(status_code=400, detail="Question too long (max 500 characters)")
+
+        if request.session_id is not None and len(request.session_id) > 128:
+            raise HTTPException(status_code=400, detail="Session ID too long (max 128 characters)")
         
-        rag = get_rag_system()
-        result = rag.ask(request.question)
+        registry = get_collection_registry()
+        collection = registry.resolve(request.collection)
+        if not registry.is_known(request.collection):
+            raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+
+        rag = registry.get(request.collection)
+        result = rag.ask(request.question, session_id=request.session_id)
         
         logger.info(f"Generated answer with {len(result['sources'])} sources")
  
@@ -0,0 +1,297 @@
+"""
+Memory-pressure watchdog for the FastAPI server
+
+Samples the memory usage of the container's cgroup (what the OOM killer
+enforces, shared by every uvicorn worker) on an interval, falling back to the
+RSS of this process and its workers outside a cgroup, and walks through a
+ladder of degradation steps as configurable thresholds are crossed (shrink
+caches, shed heavy work, drop to keyword-only retrieval). Each step is
+released again once usage plus the memory the step saved when it engaged
+stays below its threshold minus a hysteresis margin for several samples in a
+row, so a step that frees a lot (e.g. unloading the embedding model) isn't
+released only to be engaged again straight away.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MEMORY_LIMIT_MB = float(os.getenv("MEMORY_LIMIT_MB", "512"))  # Render free tier
+MEMORY_CHECK_INTERVAL = float(os.getenv("MEMORY_CHECK_INTERVAL", "5"))  # seconds
+MEMORY_HYSTERESIS_PCT = float(os.getenv("MEMORY_HYSTERESIS_PCT", "5"))
+MEMORY_RELEASE_SAMPLES = int(os.getenv("MEMORY_RELEASE_SAMPLES", "3"))  # consecutive low samples
+
+# Thresholds as a percentage of MEMORY_LIMIT_MB
+SHRINK_CACHES_PCT = float(os.getenv("MEMORY_SHRINK_CACHES_PCT", "70"))
+SHED_HEAVY_WORK_PCT = float(os.getenv("MEMORY_SHED_HEAVY_WORK_PCT", "80"))
+KEYWORD_ONLY_PCT = float(os.getenv("MEMORY_KEYWORD_ONLY_PCT", "90"))
+
+# Step names
+SHRINK_CACHES = "shrink_caches"
+SHED_HEAVY_WORK = "shed_heavy_work"
+KEYWORD_ONLY = "keyword_only"
+
+
+def get_rss_mb(include_children: bool = True) -> float:
+    """Return the resident set size of this process in MB
+
+    By default child processes (e.g. keyword shard workers) are included,
+    since their memory counts against the same instance limit.
+    """
+    try:
+        import psutil
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        if include_children:
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass  # exited while sampling
+        return rss / 1024 / 1024
+    except ImportError:
+        pass
+
+    # Linux fallback (Render) without psutil
+    try:
+        pids = _child_pids(os.getpid()) if include_children else []
+        return sum(_statm_rss_bytes(pid) for pid in ["self", *pids]) / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # Last resort: peak RSS (KB on Linux) is better than nothing
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        usage += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return usage / 1024
+
+
+# cgroup v2, then v1, as mounted inside a container
+_CGROUP_MEMORY_FILES = [
+    ("/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory.stat", "inactive_file"),
+    ("/sys/fs/cgroup/memory/memory.usage_in_bytes", "/sys/fs/cgroup/memory/memory.stat", "total_inactive_file"),
+]
+
+
+def get_cgroup_memory_mb():
+    """Return the memory charged to this container's cgroup in MB (None outside one)
+
+    Inactive page cache is left out, as the kernel reclaims it before
+    OOM-killing anything (the same "working set" container runtimes report).
+    """
+    for usage_file, stat_file, inactive_key in _CGROUP_MEMORY_FILES:
+        try:
+            with open(usage_file, "r") as usage:
+                used = int(usage.read())
+        except (OSError, ValueError):
+            continue
+
+        inactive = 0
+        try:
+            with open(stat_file, "r") as stat:
+                for line in stat:
+                    key, value = line.split()
+                    if key == inactive_key:
+                        inactive = int(value)
+                        break
+        except (OSError, ValueError):
+            pass
+        return max(used - inactive, 0) / 1024 / 1024
+    return None
+
+
+def get_memory_mb() -> float:
+    """Memory counted against the instance limit: the cgroup's, or this process tree's RSS"""
+    cgroup_mb = get_cgroup_memory_mb()
+    return cgroup_mb if cgroup_mb is not None else get_rss_mb()
+
+
+def _statm_rss_bytes(pid) -> int:
+    try:
+        with open(f"/proc/{pid}/statm", "r") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except FileNotFoundError:
+        return 0  # exited while sampling
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _child_pids(pid: int) -> list:
+    """Descendant process IDs from /proc/<pid>/task/*/children"""
+    pids = []
+    for children in Path(f"/proc/{pid}/task").glob("*/children"):
+        try:
+            direct = [int(child) for child in children.read_text().split()]
+        except FileNotFoundError:
+            continue
+        for child in direct:
+            pids.append(child)
+            pids.extend(_child_pids(child))
+    return pids
+
+
+class DegradationStep:
+    """A single rung of the degradation ladder"""
+
+    def __init__(self, name: str, threshold_mb: float, engage, release):
+        self.name = name
+        self.threshold_mb = threshold_mb
+        self.engage = engage
+        self.release = release
+        self.active = False
+        self.engaged_count = 0
+        self.released_count = 0
+        self.last_changed = None
+        self.saving_mb = 0.0  # memory freed when the step last engaged
+        self.low_samples = 0  # consecutive samples low enough to release
+
+
+class MemoryWatchdog:
+    """Samples memory usage and engages/releases degradation steps"""
+
+    def __init__(self, limit_mb: float = MEMORY_LIMIT_MB,
+                 interval: float = MEMORY_CHECK_INTERVAL,
+                 hysteresis_pct: float = MEMORY_HYSTERESIS_PCT,
+                 release_samples: int = MEMORY_RELEASE_SAMPLES,
+                 sampler=get_memory_mb):
+        self.limit_mb = limit_mb
+        self.interval = interval
+        self.hysteresis_mb = limit_mb * hysteresis_pct / 100
+        self.release_samples = max(release_samples, 1)
+        self.sampler = sampler
+        self.steps: list[DegradationStep] = []
+        self.rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.samples = 0
+        self._task = None
+
+    def add_step(self, name: str, threshold_pct: float, engage, release):
+        """Register a degradation step; steps are engaged in threshold order"""
+        step = DegradationStep(name, self.limit_mb * threshold_pct / 100, engage, release)
+        self.steps.append(step)
+        self.steps.sort(key=lambda s: s.threshold_mb)
+        return step
+
+    def is_active(self, name: str) -> bool:
+        return any(step.active for step in self.steps if step.name == name)
+
+    def accepting_heavy_work(self) -> bool:
+        """Whether batch/streaming work should be accepted right now"""
+        return not self.is_active(SHED_HEAVY_WORK)
+
+    def check(self, rss_mb: float = None):
+        """Take one sample and engage or release steps as needed
+
+        A fixed rss_mb (tests) is used as is; otherwise usage is sampled
+        again after each step engages, to measure what the step saved.
+        """
+        fixed = rss_mb is not None
+        self.rss_mb = rss_mb if fixed else self.sampler()
+        self.peak_rss_mb = max(self.peak_rss_mb, self.rss_mb)
+        self.samples += 1
+
+        # Engage from the mildest step up; a step that freed enough spares the harsher ones
+        for step in self.steps:
+            if not step.active and self.rss_mb >= step.threshold_mb:
+                self._transition(step, engage=True, resample=not fixed)
+
+        # Release from the harshest step down, once usage would stay low with the step undone
+        for step in reversed(self.steps):
+            if not step.active:
+                continue
+            if self.rss_mb + step.saving_mb < step.threshold_mb - self.hysteresis_mb:
+                step.low_samples += 1
+                if step.low_samples >= self.release_samples:
+                    self._transition(step, engage=False)
+            else:
+                step.low_samples = 0
+
+    def _transition(self, step: DegradationStep, engage: bool, resample: bool = False):
+        action = step.engage if engage else step.release
+        try:
+            action()
+        except Exception as e:
+            logger.error(f"Memory watchdog step '{step.name}' failed to "
+                         f"{'engage' if engage else 'release'}: {e}")
+            return
+
+        step.active = engage
+        step.last_changed = time.time()
+        step.low_samples = 0
+        if engage:
+            step.engaged_count += 1
+            rss_mb = self.rss_mb
+            if resample:
+                self.rss_mb = self.sampler()
+            step.saving_mb = max(rss_mb - self.rss_mb, 0.0)
+            logger.warning(f"⚠ Memory pressure: {rss_mb:.1f} MB >= "
+                           f"{step.threshold_mb:.1f} MB, engaged '{step.name}' "
+                           f"(freed {step.saving_mb:.1f} MB)")
+        else:
+            step.released_count += 1
+            logger.info(f"✓ Memory pressure eased: {self.rss_mb:.1f} MB, "
+                        f"released '{step.name}'")
+
+    async def _run(self):
+        while True:
+            try:
+                # Engaging/releasing steps may block (e.g. reloading Chroma)
+                await asyncio.to_thread(self.check)
+            except Exception as e:
+                logger.error(f"Memory watchdog sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start sampling on the running event loop"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Memory watchdog started (limit {self.limit_mb:.0f} MB, "
+                        f"every {self.interval:g}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "rss_mb": round(self.rss_mb, 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "limit_mb": self.limit_mb,
+            "usage_pct": round(self.rss_mb / self.limit_mb * 100, 1) if self.limit_mb else None,
+            "samples": self.samples,
+            "source": "cgroup" if self.sampler is get_memory_mb and get_cgroup_memory_mb() is not None else "rss",
+            "steps": [
+                {
+                    "name": step.name,
+                    "threshold_mb": round(step.threshold_mb, 1),
+                    "active": step.active,
+                    "engaged_count": step.engaged_count,
+                    "released_count": step.released_count,
+                    "saving_mb": round(step.saving_mb, 1),
+                    "last_changed": step.last_changed,
+                }
+                for step in self.steps
+            ],
+        }
+
+
+# Singleton instance
+_watchdog = None
+
+
+def get_memory_watchdog() -> MemoryWatchdog:
+    """Get or create the memory watchdog singleton"""
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = MemoryWatchdog()
+    return _watchdog
@@ -2,16 +2,27 @@
 RAG System using LangChain, ChromaDB Vector Store, and HuggingFace
 """
 
+import ctypes
+import gc
 import json
 import os
 import re
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
-from langchain.schema.output_parser import StrOutputParser
-import requests
+from answer_cache import get_answer_cache, compute_content_version
+from keyword_index import build_keyword_index, tokenize
+from session_store import (
+    SESSION_KEYWORD_THRESHOLD, SESSION_RERANK_THRESHOLD, SessionStore, content_terms, coverage,
+    depends_on_context, embedding_scores, idf, normalize_vector, term_scores, top,
+)
+from startup_profile import get_startup_profile
+
+# Heavy dependencies (langchain/chromadb, requests) are imported lazily by the
+# tier that needs them so a keyword-only deployment never loads them.
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +30,17 @@ load_dotenv()
 # Configuration
 PERSIST_DIRECTORY = os.getenv("PERSIST_DIRECTORY", str(Path(__file__).parent.parent / "chroma_db"))
 COLLECTION_NAME_RAW = os.getenv("COLLECTION_NAME", "website_content")
+ENABLE_VECTOR_STORE = os.getenv("ENABLE_VECTOR_STORE", "true").lower() in ("1", "true", "yes")
+CONTENT_DIR = Path(__file__).parent.parent / "data" / "content"
+
+# Multi-collection serving: extra collections live in CONTENT_DIR/<name>/ (or are
+# listed in COLLECTIONS) and are loaded on first use, evicting the least recently
+# used ones once their estimated footprint exceeds the budget.
+COLLECTION_MEMORY_BUDGET_MB = float(os.getenv("COLLECTION_MEMORY_BUDGET_MB", "150"))
+# Content directories are named as the collection was requested (e.g. "en"), which
+# may differ from its sanitized ChromaDB name ("en0"); only plain names are mapped
+_COLLECTION_DIR_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+_HNSW_LINK_BYTES = 2 * 16 * 4 + 12  # level-0 neighbour links (M=16) and label per vector
 
 def sanitize_collection_name(name: str) -> str:
     """
@@ -65,6 +87,101 @@ def sanitize_collection_name(name: str) -> str:
     return name
 
 COLLECTION_NAME = sanitize_collection_name(COLLECTION_NAME_RAW)
+EXTRA_COLLECTIONS = [
+    sanitize_collection_name(c.strip()) for c in os.getenv("COLLECTIONS", "").split(",") if c.strip()
+]
+
+
+class QueryEmbeddings:
+    """langchain-style embeddings from chromadb's bundled ONNX all-MiniLM-L6-v2
+
+    Query embeddings must come from the model ingest_data.py embeds documents
+    with; chromadb ships the same all-MiniLM-L6-v2 as an ONNX model, which
+    runs on onnxruntime without loading sentence-transformers and torch.
+    """
+
+    def __init__(self):
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        self._function = ONNXMiniLM_L6_V2()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._function(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._function([text])[0]
+
+
+# Singleton instance, shared by every collection
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings():
+    """Get or create the shared query embedding model (loaded on first use)"""
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            with get_startup_profile().phase("load embedding model"):
+                _embeddings = QueryEmbeddings()
+        return _embeddings
+
+
+def release_embeddings():
+    """Drop the shared embedding model (memory pressure); it reloads on next use"""
+    global _embeddings
+    with _embeddings_lock:
+        _embeddings = None
+
+
+def release_chroma_systems():
+    """Stop chromadb's cached client systems so their segments and HNSW indexes are freed
+
+    chromadb keeps one System per persist directory in a class-level cache
+    shared by every collection, so dropping the langchain wrappers alone
+    releases almost nothing.
+    """
+    if "chromadb" not in sys.modules:
+        return
+    from chromadb.api.client import SharedSystemClient
+
+    for system in list(SharedSystemClient._identifer_to_system.values()):
+        try:
+            system.stop()
+        except Exception as e:
+            print(f"⚠ Failed to stop ChromaDB system: {e}")
+    SharedSystemClient.clear_system_cache()
+
+
+def release_chroma_collection(vector_store):
+    """Drop one collection's segments (HNSW index and metadata reader) from chromadb
+
+    chromadb 0.4's segment manager keeps the segments of every collection it
+    has served loaded for the life of the shared system, with no public way
+    to release them, so evicting a collection would otherwise leave its
+    vectors in memory. They are loaded again if the collection is used later.
+    """
+    from chromadb.segment import SegmentManager
+
+    try:
+        manager = vector_store._client._system.instance(SegmentManager)
+        collection_id = vector_store._collection.id
+    except Exception as e:
+        print(f"⚠ Could not release ChromaDB segments: {e}")
+        return
+
+    with manager._lock:
+        segments = manager._segment_cache.pop(collection_id, {})
+        instances = [manager._instances.pop(segment["id"], None) for segment in segments.values()]
+        file_handles = getattr(manager, "_vector_instances_file_handle_cache", None)
+        if file_handles is not None:
+            file_handles.cache.pop(collection_id, None)
+
+    for instance in instances:
+        if instance is None:
+            continue
+        instance.stop()
+        if hasattr(instance, "close_persistent_index"):
+            instance.close_persistent_index()
 
 
 def load_documents_from_content_dir(content_dir: Path):
@@ -95,7 +212,7 @@ def load_documents_from_content_dir(content_dir: Path):
                 else:
                     continue
 
-                documents.append({"page_content": text, "metadata": metadata})
+                documents.append({"id": f"{json_file.stem}-{len(documents)}", "page_content": text, "metadata": metadata})
 
         elif "questions" in data:
             for qa in data["questions"]:
@@ -105,7 +222,7 @@ def load_documents_from_content_dir(content_dir: Path):
                     "page": page_name,
                     "question": qa["question"],
                 }
-                documents.append({"page_content": text, "metadata": metadata})
+                documents.append({"id": f"{json_file.stem}-{len(documents)}", "page_content": text, "metadata": metadata})
 
         elif "studies" in data:
             for study in data["studies"]:
@@ -115,7 +232,7 @@ def load_documents_from_content_dir(content_dir: Path):
                     "page": page_name,
                     "client": study["client"],
                 }
-                documents.append({"page_content": text, "metadata": metadata})
+                documents.append({"id": f"{json_file.stem}-{len(documents)}", "page_content": text, "metadata": metadata})
 
     return documents
 
@@ -123,23 +240,64 @@ def load_documents_from_content_dir(content_dir: Path):
 class RAGSystem:
     """RAG system for answering questions about Safik AI - OPTIMIZED for low memory"""
 
-    def __init__(self):
+    def __init__(self, collection_name: str = COLLECTION_NAME, content_dir: Path = CONTENT_DIR,
+                 load_vector_store: bool = ENABLE_VECTOR_STORE):
         """Initialize the RAG system with ChromaDB and optional HuggingFace Inference API"""
-        print("Initializing RAG system (optimized for low memory)...")
+        print(f"Initializing RAG system for '{collection_name}' (optimized for low memory)...")
 
+        self.collection_name = collection_name
         self.vector_store = None
         self.retriever = None
         self.fallback_documents = []
+        self.keyword_index = None
+        self.semantic_cache = None
+        self.sessions = SessionStore()
         self.use_vector_store = False
         self.hf_api_token = os.getenv("HUGGINGFACEHUB_API_TOKEN", None)
         self.hf_api_enabled = bool(self.hf_api_token)
+        self.api_failures = 0
+
+        profile = get_startup_profile()
 
-        # Try to load ChromaDB (no embedding model needed for default backend)
+        # Try to load ChromaDB (queries use the shared embedding model)
+        if load_vector_store:
+            with profile.phase("load vector store"):
+                self._load_vector_store()
+        elif not ENABLE_VECTOR_STORE:
+            print("ℹ Vector store disabled (ENABLE_VECTOR_STORE=false), using keyword search only")
+
+        # Load fallback documents for keyword search
+        print("Loading fallback documents for keyword search...")
+        with profile.phase("load keyword documents"):
+            self.fallback_documents = load_documents_from_content_dir(content_dir)
+        with profile.phase("build keyword index"):
+            self.keyword_index = build_keyword_index(self.fallback_documents)
+        print(f"✓ Loaded {len(self.fallback_documents)} fallback documents")
+
+        # Persistent answer cache shared across workers and restarts
+        self.content_version = compute_content_version(content_dir)
+        self.answer_cache = get_answer_cache()
+
+        if self.hf_api_enabled:
+            print("✓ HuggingFace Inference API enabled for better answer generation")
+        else:
+            print("ℹ HuggingFace Inference API not configured (set HUGGINGFACEHUB_API_TOKEN)")
+
+        print("✅ RAG system initialized successfully!")
+
+    def _load_vector_store(self):
+        """Load the ChromaDB vector store and retriever if data is available"""
         try:
             print(f"Loading ChromaDB vector store from {PERSIST_DIRECTORY}...")
+            with get_startup_profile().phase("import langchain_community.vectorstores"):
+                from langchain_community.vectorstores import Chroma
+
+            # langchain's Chroma never hands an embedding function to chromadb,
+            # so queries must be embedded through an explicit one
             self.vector_store = Chroma(
                 persist_directory=PERSIST_DIRECTORY,
-                collection_name=COLLECTION_NAME
+                collection_name=self.collection_name,
+                embedding_function=get_embeddings()
             )
 
             # Try to retrieve to verify it works
@@ -151,6 +309,11 @@ class RAGSystem:
                     search_kwargs={"k": 4}
                 )
                 self.use_vector_store = True
+
+                # Paraphrased questions reuse retrievals of similar earlier queries
+                if self.semantic_cache is None:
+                    from semantic_cache import SemanticCache
+                    self.semantic_cache = SemanticCache()
             else:
                 print("⚠ ChromaDB empty or not properly initialized")
                 self.use_vector_store = False
@@ -158,18 +321,64 @@ class RAGSystem:
             print(f"⚠ ChromaDB not available: {e}")
             self.use_vector_store = False
 
-        # Load fallback documents for keyword search
-        print("Loading fallback documents for keyword search...")
-        content_dir = Path(__file__).parent.parent / "data" / "content"
-        self.fallback_documents = load_documents_from_content_dir(content_dir)
-        print(f"✓ Loaded {len(self.fallback_documents)} fallback documents")
+    def unload_vector_store(self):
+        """Drop the vector store and serve keyword-only retrieval (memory pressure)"""
+        self.use_vector_store = False
+        self.retriever = None
+        if self.vector_store is not None:
+            release_chroma_collection(self.vector_store)
+        self.vector_store = None
+        self.semantic_cache = None
+        self._release_memory()
+        print("⚠ Vector store unloaded, serving keyword-only retrieval")
 
-        if self.hf_api_enabled:
-            print("✓ HuggingFace Inference API enabled for better answer generation")
-        else:
-            print("ℹ HuggingFace Inference API not configured (set HUGGINGFACEHUB_API_TOKEN)")
+    def estimated_footprint_mb(self) -> float:
+        """Memory held by this collection's own data: documents, keyword index and vectors
 
-        print("✅ RAG system initialized successfully!")
+        Estimated from the data rather than RSS so shared costs (imported
+        libraries, the embedding model, the ChromaDB client) aren't charged
+        to whichever collection happened to load first.
+        """
+        size = self.keyword_index.memory_bytes if self.keyword_index is not None else 0
+        for doc in self.fallback_documents:
+            size += sys.getsizeof(doc) + sys.getsizeof(doc["page_content"]) + sys.getsizeof(doc["metadata"])
+
+        if self.use_vector_store:
+            try:
+                collection = self.vector_store._collection
+                sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+                dimensions = len(sample[0]) if sample else 0
+                size += collection.count() * (dimensions * 4 + _HNSW_LINK_BYTES)
+            except Exception as e:
+                print(f"⚠ Could not size vector store for '{self.collection_name}': {e}")
+        return size / 1024 / 1024
+
+    def reload_vector_store(self):
+        """Reload the vector store after memory pressure has eased"""
+        if ENABLE_VECTOR_STORE and self.vector_store is None:
+            self._load_vector_store()
+
+    def shrink_caches(self):
+        """Release memory held by caches (memory pressure)"""
+        if self.semantic_cache is not None:
+            self.semantic_cache.shrink()
+        self.sessions.shrink()
+        self._release_memory()
+
+    def restore_caches(self):
+        """Restore cache capacity after memory pressure has eased"""
+        if self.semantic_cache is not None:
+            self.semantic_cache.restore()
+        self.sessions.restore()
+
+    @staticmethod
+    def _release_memory():
+        """Run the garbage collector and hand freed heap pages back to the OS"""
+        gc.collect()
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
 
     def _generate_answer_with_api(self, question: str, context: str) -> str:
         """Generate answer using HuggingFace Inference API (lightweight)"""
@@ -177,6 +386,8 @@ class RAGSystem:
             return None
 
         try:
+            import requests
+
             prompt = f"""You are a helpful AI assistant for Safik AI, an AI services company.
 Answer the user's question based on the provided context. Be professional, friendly, and informative.
 
@@ -200,7 +411,8 @@ Answer:"""
                     return self._clean_generated_text(text)
         except Exception as e:
             print(f"API generation failed: {e}")
-        
+
+        self.api_failures += 1
         return None
 
     def _clean_generated_text(self, text: str) -> str:
@@ -223,22 +435,76 @@ Answer:"""
         return ""
 
     def _tokenize(self, text: str):
-        return set(re.findall(r"[a-z0-9]+", text.lower()))
+        return tokenize(text)
 
     def _fallback_retrieve(self, question: str, top_k: int = 4):
         """Keyword-based retrieval using token matching"""
-        query_tokens = self._tokenize(question)
-        scored_docs = []
+        return self.keyword_index.search(self._tokenize(question), top_k)
 
-        for doc in self.fallback_documents:
-            doc_tokens = self._tokenize(doc["page_content"])
-            # Score based on token overlap
-            score = len(query_tokens & doc_tokens)
-            if score > 0:
-                scored_docs.append((score, doc))
+    def _embed_query(self, question: str):
+        """Embed a query with the ingestion embedding model (None if unavailable)"""
+        try:
+            return self.vector_store.embeddings.embed_query(question)
+        except Exception as e:
+            print(f"Query embedding failed: {e}")
+            return None
+
+    def _vector_retrieve(self, embedding, top_k: int = 4, with_embeddings: bool = False):
+        """Similarity search by a precomputed query embedding, keeping document IDs
+
+        Returns (documents, embeddings); embeddings is None unless requested.
+        """
+        include = ["documents", "metadatas"] + (["embeddings"] if with_embeddings else [])
+        results = self.vector_store._collection.query(
+            query_embeddings=[embedding],
+            n_results=top_k,
+            include=include
+        )
+        docs = [
+            {"id": doc_id, "page_content": text, "metadata": metadata or {}}
+            for doc_id, text, metadata in zip(
+                results["ids"][0], results["documents"][0], results["metadatas"][0]
+            )
+        ]
+        return docs, (results["embeddings"][0] if with_embeddings else None)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _document_terms(text: str) -> frozenset:
+        """Tokens of a document, cached for follow-ups re-ranking the same candidates"""
+        return frozenset(tokenize(text))
+
+    def _keyword_document(self, doc_id: str):
+        """Keyword documents are identified by '<source>-<position>'"""
+        try:
+            doc = self.fallback_documents[int(doc_id.rsplit("-", 1)[1])]
+        except (IndexError, ValueError):
+            return None
+        return doc if doc["id"] == doc_id else None
+
+    def _documents_for_ids(self, doc_ids: list, with_embeddings: bool = False):
+        """Look up documents by ID, keyword documents in memory and the rest in ChromaDB
 
-        scored_docs.sort(key=lambda item: item[0], reverse=True)
-        return [item[1] for item in scored_docs[:top_k]]
+        Returns (documents, embeddings) in the order found; embeddings is
+        None unless requested, with None entries for keyword documents.
+        """
+        found = {doc_id: (doc, None) for doc_id in doc_ids if (doc := self._keyword_document(doc_id))}
+        missing = [doc_id for doc_id in doc_ids if doc_id not in found]
+        if missing and self.use_vector_store:
+            include = ["documents", "metadatas"] + (["embeddings"] if with_embeddings else [])
+            try:
+                results = self.vector_store._collection.get(ids=missing, include=include)
+                vectors = results["embeddings"] if with_embeddings else [None] * len(results["ids"])
+                for doc_id, text, metadata, vector in zip(
+                    results["ids"], results["documents"], results["metadatas"], vectors
+                ):
+                    found[doc_id] = ({"id": doc_id, "page_content": text, "metadata": metadata or {}}, vector)
+            except Exception as e:
+                print(f"Document lookup failed: {e}")
+
+        ordered = [found[doc_id] for doc_id in doc_ids if doc_id in found]
+        docs = [doc for doc, _ in ordered]
+        return docs, ([vector for _, vector in ordered] if with_embeddings else None)
 
     def _fallback_answer(self, question: str, relevant_docs):
         """Generate answer from relevant documents without LLM"""
@@ -275,29 +541,77 @@ Answer:"""
         return "I found related content but need more context to answer fully."
     
     
-    def ask(self, question: str) -> dict:
+    def ask(self, question: str, session_id: str = None) -> dict:
         """
         Ask a question and get an answer with sources
 
         Args:
             question: The user's question
+            session_id: Optional conversation ID; questions that refer back
+                to the conversation are retrieved with its context
 
         Returns:
             dict with 'answer' and 'sources' keys
         """
-        # Try vector store first, then fallback to keyword search
+        # Answers depend on content, retrieval tier and generation mode
+        tier = "vector" if self.use_vector_store and self.retriever else "keyword"
+        cache_version = f"{self.content_version}:{tier}:{'hf' if self.hf_api_enabled else 'extractive'}"
+        query_tokens = self._tokenize(question)
+
+        session = self.sessions.get_or_create(session_id) if session_id else None
+        # Only questions that depend on the conversation bypass the question-keyed caches
+        follow_up = session is not None and session.turns > 0 and depends_on_context(question)
+
+        cached = None
+        if not follow_up and self.answer_cache is not None:
+            cached = self.answer_cache.get(self.collection_name, cache_version, question)
+
+        # Embed only when something needs the vector: the semantic cache and
+        # retrieval on an exact-cache miss, or the session's context
+        embedding = None
+        semantic_cache = self.semantic_cache
+        if tier == "vector" and (session is not None or (cached is None and semantic_cache is not None)):
+            embedding = self._embed_query(question)
+
+        # Semantic cache: reuse the retrieval and answer of a near-identical query
+        if not follow_up and cached is None and embedding is not None and semantic_cache is not None:
+            hit = semantic_cache.lookup(embedding)
+            cached = hit[1] if hit is not None else None
+
+        if cached is not None:
+            if session is not None:
+                self._record_turn(session, query_tokens, embedding, cached.get("doc_ids", []))
+            return cached
+
         relevant_docs = []
-        
-        if self.use_vector_store and self.retriever:
+        retrieved_tier = tier
+
+        # Try vector store first, then fallback to keyword search
+        if follow_up:
+            self.sessions.follow_ups += 1
+            relevant_docs, retrieved_tier = self._follow_up_retrieve(session, query_tokens, embedding, tier)
+        elif tier == "vector":
+            doc_embeddings = None
             try:
-                relevant_docs = self.retriever.invoke(question)
+                if embedding is not None:
+                    relevant_docs, doc_embeddings = self._vector_retrieve(
+                        embedding, with_embeddings=session is not None
+                    )
+                else:
+                    relevant_docs = self.retriever.invoke(question)
             except Exception as e:
                 print(f"Vector store query failed: {e}, falling back to keyword search")
                 relevant_docs = self._fallback_retrieve(question)
+                retrieved_tier = "keyword"
+            if session is not None:
+                self._record_turn(session, query_tokens, embedding, self._doc_ids(relevant_docs), doc_embeddings)
         else:
             relevant_docs = self._fallback_retrieve(question)
-        
+            if session is not None:
+                self._record_turn(session, query_tokens, None, self._doc_ids(relevant_docs))
+
         # Generate answer
+        api_failures = self.api_failures
         answer = self._fallback_answer(question, relevant_docs)
         
         # Extract source information
@@ -319,28 +633,317 @@ Answer:"""
                 sources.append(source_info)
                 seen_sources.add(source_info)
 
-        return {
+        result = {
             "answer": answer,
             "sources": sources[:3],  # Return top 3 sources
-            "num_sources": len(relevant_docs)
+            "num_sources": len(relevant_docs),
+            "doc_ids": self._doc_ids(relevant_docs),  # lets cache hits seed a session's candidates
         }
 
+        # Don't cache follow-ups or answers produced by a degraded path (vector query or API failure)
+        if not follow_up and retrieved_tier == tier and self.api_failures == api_failures:
+            if self.answer_cache is not None:
+                self.answer_cache.put(self.collection_name, cache_version, question, result)
+            if embedding is not None and semantic_cache is not None:
+                semantic_cache.store(embedding, result["doc_ids"], result)
+
+        return result
+
+    @staticmethod
+    def _doc_ids(docs) -> list:
+        return [doc["id"] for doc in docs if isinstance(doc, dict) and "id" in doc]
+
+    def _record_turn(self, session, query_tokens: set, embedding, doc_ids: list, doc_embeddings=None):
+        """Add a turn to the session; cache hits look up their documents' embeddings"""
+        if doc_embeddings is None and embedding is not None and doc_ids:
+            _, doc_embeddings = self._documents_for_ids(doc_ids, with_embeddings=True)
+            if len(doc_embeddings) != len(doc_ids):
+                doc_embeddings = None
+        session.record(content_terms(query_tokens), embedding, doc_ids, doc_embeddings)
+
+    def _follow_up_retrieve(self, session, query_tokens: set, embedding, tier: str):
+        """Retrieve for a question that depends on the conversation
+
+        The session's recent documents are re-ranked first and answer on
+        their own when the best of them matches the question itself closely
+        enough. Otherwise full retrieval runs with the conversation context
+        and they are ranked alongside its results under the same scoring, so
+        they only displace fresh results that score lower.
+        Returns (documents, tier actually used).
+        """
+        query_terms = content_terms(query_tokens)
+        with session.lock:
+            candidates = dict(session.candidates)
+        fresh = None  # results of full retrieval, if it ran
+
+        if tier == "vector" and embedding is not None:
+            query = session.contextualize(embedding)
+            vectors = {doc_id: vector for doc_id, vector in candidates.items() if vector is not None}
+            documents = {}
+            confidence = max(embedding_scores(normalize_vector(embedding), vectors).values(), default=0.0)
+            if confidence < SESSION_RERANK_THRESHOLD:
+                try:
+                    fresh, fresh_embeddings = self._vector_retrieve(list(query), with_embeddings=True)
+                except Exception as e:
+                    print(f"Vector store query failed: {e}, falling back to keyword search")
+                    return self._follow_up_retrieve(session, query_tokens, None, "keyword")
+                documents = {doc["id"]: doc for doc in fresh}
+                vectors.update(zip(documents, map(normalize_vector, fresh_embeddings)))
+            scores = embedding_scores(query, vectors)
+        else:
+            tier = "keyword"
+            context = session.context(query_terms)
+            documents = {doc["id"]: doc for doc in map(self._keyword_document, candidates) if doc}
+            document_terms = {doc_id: self._document_terms(doc["page_content"]) for doc_id, doc in documents.items()}
+            frequencies = self.keyword_index.document_frequencies(query_terms | context)
+            weights = {term: idf(count, len(self.fallback_documents)) for term, count in frequencies.items()}
+
+            confidence = max((coverage(query_terms, terms, weights) for terms in document_terms.values()), default=0.0)
+            if confidence < SESSION_KEYWORD_THRESHOLD:
+                fresh = self.keyword_index.search(query_tokens, 4)
+                if context:
+                    fresh += self.keyword_index.search(query_terms | context, 4)
+                for doc in fresh:
+                    if doc["id"] not in documents:
+                        documents[doc["id"]] = doc
+                        document_terms[doc["id"]] = self._document_terms(doc["page_content"])
+            scores = term_scores(query_terms, context, document_terms, weights)
+            vectors = {}
+
+        ranked = top(scores)
+        if fresh is None:
+            self.sessions.reused += 1
+        elif set(ranked) - {doc["id"] for doc in fresh}:
+            self.sessions.candidate_hits += 1
+
+        # Vector candidates keep only their embeddings; fetch the documents that made the cut
+        missing = [doc_id for doc_id in ranked if doc_id not in documents]
+        if missing:
+            documents.update((doc["id"], doc) for doc in self._documents_for_ids(missing)[0])
+
+        relevant_docs = [documents[doc_id] for doc_id in ranked if doc_id in documents]
+        doc_ids = self._doc_ids(relevant_docs)
+        session.record(query_terms, embedding, doc_ids,
+                       [vectors.get(doc_id) for doc_id in doc_ids] if vectors else None)
+        return relevant_docs, tier
+
+    def prewarm(self, questions: list[str], should_continue=None) -> int:
+        """Answer a list of top questions so their answers are cached
+
+        should_continue is checked before each question (e.g. to stop under
+        memory pressure). Returns the number of questions processed.
+        """
+        if self.answer_cache is None:
+            return 0
+
+        warmed = 0
+        for question in questions:
+            if should_continue is not None and not should_continue():
+                print(f"⚠ Cache pre-warm paused after {warmed} questions")
+                break
+            try:
+                self.ask(question)
+                warmed += 1
+            except Exception as e:
+                print(f"Pre-warm failed for '{question}': {e}")
+        return warmed
+
     def close(self):
-        """Close ChromaDB connection"""
+        """Release ChromaDB segments and stop keyword index workers"""
         # ChromaDB handles persistence automatically, no explicit close needed
-        pass
+        if self.vector_store is not None:
+            release_chroma_collection(self.vector_store)
+        if self.keyword_index is not None:
+            self.keyword_index.close()
+
+
+class CollectionRegistry:
+    """Lazily loaded RAG systems, one per collection, with LRU eviction"""
+
+    def __init__(self, memory_budget_mb: float = COLLECTION_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self.keyword_only = False  # set while the memory watchdog has unloaded vector stores
+        self._systems = OrderedDict()  # collection name -> RAGSystem, least recently used first
+        self._footprints = {}  # collection name -> estimated MB
+        self._stats = {}  # collection name -> counters
+        self._load_locks = {}  # collection name -> lock held while it loads
+        self._lock = threading.RLock()
+
+    def resolve(self, collection: str = None) -> str:
+        """Map a requested collection to its sanitized name (default when empty)"""
+        if not collection:
+            return COLLECTION_NAME
+        return sanitize_collection_name(collection)
+
+    def content_dir_for(self, collection: str = None):
+        """Content directory for a requested collection, named as requested
+
+        Returns None for names that aren't a plain directory name.
+        """
+        if not collection or self.resolve(collection) == COLLECTION_NAME:
+            return CONTENT_DIR
+        if not _COLLECTION_DIR_RE.match(collection) or ".." in collection:
+            return None
+        return CONTENT_DIR / collection
+
+    def is_known(self, collection: str = None) -> bool:
+        """Only serve configured collections, so arbitrary names can't consume memory"""
+        name = self.resolve(collection)
+        if name == COLLECTION_NAME or name in EXTRA_COLLECTIONS:
+            return True
+        content_dir = self.content_dir_for(collection)
+        return content_dir is not None and content_dir.is_dir()
+
+    def get(self, collection: str = None) -> RAGSystem:
+        """Return the RAG system for a collection, loading it on first use"""
+        name = self.resolve(collection)
+        with self._lock:
+            rag = self._hit(name)
+            if rag is not None:
+                return rag
+            if not self.is_known(collection):
+                raise KeyError(f"Unknown collection: {name}")
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Build outside the registry lock so other collections (and the memory
+        # watchdog) aren't blocked; concurrent requests for this one wait here
+        with load_lock:
+            with self._lock:
+                rag = self._hit(name)
+                if rag is not None:
+                    return rag
+                stats = self._stats.setdefault(name, {"loads": 0, "hits": 0, "misses": 0, "evictions": 0})
+                stats["misses"] += 1
+                stats["loads"] += 1
+                keyword_only = self.keyword_only
+
+            rag = RAGSystem(
+                collection_name=name,
+                content_dir=self.content_dir_for(collection) or CONTENT_DIR / name,
+                load_vector_store=ENABLE_VECTOR_STORE and not keyword_only,
+            )
+
+            with self._lock:
+                # Memory pressure may have set in while this collection was loading
+                if self.keyword_only and not keyword_only:
+                    rag.unload_vector_store()
+                self._systems[name] = rag
+                self._footprints[name] = rag.estimated_footprint_mb()
+                self._enforce_budget(keep=name)
+                return rag
+
+    def _hit(self, name: str):
+        rag = self._systems.get(name)
+        if rag is not None:
+            self._stats[name]["hits"] += 1
+            self._systems.move_to_end(name)
+        return rag
+
+    def evict(self, name: str):
+        with self._lock:
+            rag = self._systems.pop(name, None)
+            if rag is None:
+                return
+            self._footprints.pop(name, None)
+            self._stats[name]["evictions"] += 1
+            rag.close()
+            rag._release_memory()
+            print(f"♻ Evicted collection '{name}'")
+
+    def _enforce_budget(self, keep: str):
+        """Evict least recently used collections until within the memory budget"""
+        while sum(self._footprints.values()) > self.memory_budget_mb:
+            victim = next((name for name in self._systems if name != keep), None)
+            if victim is None:
+                break
+            self.evict(victim)
+
+    def shrink_caches(self):
+        """Memory pressure: keep only the most recently used collection"""
+        with self._lock:
+            for name in list(self._systems)[:-1]:
+                self.evict(name)
+            for rag in self._systems.values():
+                rag.shrink_caches()
+
+    def restore_caches(self):
+        with self._lock:
+            for rag in self._systems.values():
+                rag.restore_caches()
+
+    def unload_vector_stores(self):
+        with self._lock:
+            self.keyword_only = True
+            for name, rag in self._systems.items():
+                rag.unload_vector_store()
+                self._footprints[name] = rag.estimated_footprint_mb()
+            # The chromadb system and embedding model are shared by all collections,
+            # so release them once all are unloaded
+            release_chroma_systems()
+            release_embeddings()
+            RAGSystem._release_memory()
+
+    def reload_vector_stores(self):
+        with self._lock:
+            self.keyword_only = False
+            systems = list(self._systems.items())
+
+        # Loading ChromaDB and the embedding model is slow; don't block get() meanwhile
+        for name, rag in systems:
+            rag.reload_vector_store()
+            footprint = rag.estimated_footprint_mb()
+            with self._lock:
+                if self._systems.get(name) is not rag:
+                    rag.unload_vector_store()  # evicted while reloading
+                    continue
+                self._footprints[name] = footprint
+                self._enforce_budget(keep=next(reversed(self._systems)))
+
+    def close(self):
+        with self._lock:
+            for rag in self._systems.values():
+                rag.close()
+            self._systems.clear()
+            self._footprints.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            collections = {}
+            for name, stats in self._stats.items():
+                requests_seen = stats["hits"] + stats["misses"]
+                rag = self._systems.get(name)
+                collections[name] = {
+                    **stats,
+                    "hit_rate": round(stats["hits"] / requests_seen, 3) if requests_seen else None,
+                    "loaded": rag is not None,
+                    "vector_store_loaded": bool(rag and rag.use_vector_store),
+                    "fallback_documents": len(rag.fallback_documents) if rag else 0,
+                    "semantic_cache": rag.semantic_cache.metrics() if rag and rag.semantic_cache else None,
+                    "sessions": rag.sessions.metrics() if rag else None,
+                    "estimated_mb": round(self._footprints.get(name, 0.0), 1),
+                }
+            return {
+                "memory_budget_mb": self.memory_budget_mb,
+                "estimated_mb": round(sum(self._footprints.values()), 1),
+                "collections": collections,
+            }
 
 
 # Singleton instance
-_rag_system = None
+_registry = None
+
+
+def get_collection_registry() -> CollectionRegistry:
+    """Get or create the collection registry singleton"""
+    global _registry
+    if _registry is None:
+        _registry = CollectionRegistry()
+    return _registry
 
 
-def get_rag_system() -> RAGSystem:
-    """Get or create the RAG system singleton"""
-    global _rag_system
-    if _rag_system is None:
-        _rag_system = RAGSystem()
-    return _rag_system
+def get_rag_system(collection: str = None) -> RAGSystem:
+    """Get the RAG system for a collection (the default collection if omitted)"""
+    return get_collection_registry().get(collection)
 
 
 if __name__ == "__main__":
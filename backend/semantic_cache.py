@@ -0,0 +1,115 @@
+"""
+Semantic retrieval cache keyed by query embedding
+
+Keeps recent query embeddings in a small normalized matrix; a new query
+whose cosine similarity to a cached one is above the threshold reuses that
+query's retrieved document IDs and generated answer. Eviction is LRU.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+# Configuration
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+
+class SemanticCache:
+    """Fixed-capacity cache with vectorized cosine lookup"""
+
+    def __init__(self, capacity: int = SEMANTIC_CACHE_SIZE,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.capacity = capacity
+        self.max_capacity = capacity
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors = None  # (capacity, dim) float32, rows L2-normalized
+        self._entries = []  # slot -> (doc_ids, result)
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding):
+        """Return (doc_ids, result) of the most similar cached query, or None"""
+        query = self._normalize(embedding)
+        with self._lock:
+            size = len(self._entries)
+            if size == 0 or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors[:size] @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._clock += 1
+            self._last_used[best] = self._clock
+            return self._entries[best]
+
+    def store(self, embedding, doc_ids: list, result: dict):
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self.capacity <= 0:
+                return
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+                self._entries = []
+
+            if len(self._entries) < self.capacity:
+                slot = len(self._entries)
+                self._entries.append(None)
+            else:
+                slot = int(np.argmin(self._last_used[:self.capacity]))
+                self.evictions += 1
+
+            self._clock += 1
+            self._vectors[slot] = vector
+            self._entries[slot] = (list(doc_ids), result)
+            self._last_used[slot] = self._clock
+
+    def resize(self, capacity: int):
+        """Change capacity, keeping the most recently used entries"""
+        with self._lock:
+            size = len(self._entries)
+            keep = np.argsort(-self._last_used[:size])[:capacity] if size else []
+            if self._vectors is not None:
+                vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+                vectors[:len(keep)] = self._vectors[keep]
+                self._vectors = vectors
+            last_used = np.zeros(capacity, dtype=np.int64)
+            last_used[:len(keep)] = self._last_used[keep]
+            self._last_used = last_used
+            self._entries = [self._entries[i] for i in keep]
+            self.capacity = capacity
+
+    def shrink(self):
+        """Memory pressure: keep only a quarter of the entries"""
+        self.resize(self.max_capacity // 4)
+
+    def restore(self):
+        self.resize(self.max_capacity)
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
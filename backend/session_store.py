@@ -0,0 +1,235 @@
+"""
+Server-side conversation sessions for follow-up questions
+
+A question only counts as a follow-up when it depends on the conversation:
+it continues it ("and ...", "what about ..."), refers back to something it
+doesn't name itself ("how much does it cost?"), or has no content words of
+its own. A follow-up first re-ranks the documents recently retrieved for
+the session; when the best of them matches the question well enough it is
+answered from them without retrieval. Otherwise full retrieval runs with
+the conversation context (recent query embeddings on the vector tier,
+recent question terms on the keyword tier) and the session's documents are
+ranked together with the fresh results under the same scoring, so they are
+only kept when they beat what full retrieval returns.
+Sessions expire after a TTL and the store is size-capped (LRU).
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+
+# Configuration
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))  # seconds
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))  # sessions per collection
+SESSION_MAX_CANDIDATES = int(os.getenv("SESSION_MAX_CANDIDATES", "16"))
+SESSION_CONTEXT_WEIGHT = float(os.getenv("SESSION_CONTEXT_WEIGHT", "0.5"))
+# Answer a follow-up from the session's documents when the best one reaches this
+# cosine similarity (vector tier) or share of the question's IDF weight (keyword tier)
+SESSION_RERANK_THRESHOLD = float(os.getenv("SESSION_RERANK_THRESHOLD", "0.5"))
+SESSION_KEYWORD_THRESHOLD = float(os.getenv("SESSION_KEYWORD_THRESHOLD", "0.5"))
+SESSION_CONTEXT_TURNS = 3  # questions whose terms form the keyword context
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before but by can could
+describe did do does doing explain for from get give had has have how i if in
+into is just know like me more most my no not of on or our out over please s
+so some t tell than that the their them then there these they this those to
+too us want was we were what when where which who why will with would you
+your
+""".split())
+
+# Words that only make sense with an earlier question to refer to
+REFERENCE_WORDS = frozenset("it its that this these those they them their one ones same else".split())
+CONTINUATIONS = frozenset("and also but so then".split())
+# Content words that ask about something without naming it ("how much does it cost?")
+QUESTION_TERMS = frozenset("""
+available better best compare cost costs difference different good help include
+included includes long many mean means much need offer offers price result
+results take takes time use used well work works
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def content_terms(tokens) -> set:
+    return set(tokens) - STOPWORDS
+
+
+def depends_on_context(question: str) -> bool:
+    """Whether a question needs the earlier conversation to be understood
+
+    A reference word only counts when nothing the question names comes
+    before it and the question names at most one thing itself, so "What is
+    RAG and how does it work?" stands alone but "Does it include support?"
+    doesn't.
+    """
+    words = _WORD_RE.findall(question.lower())
+    if not words:
+        return False
+    if words[0] in CONTINUATIONS or words[:2] in (["what", "about"], ["how", "about"]):
+        return True
+    if not content_terms(words):
+        return True
+
+    named = content_terms(words) - QUESTION_TERMS - REFERENCE_WORDS
+    for position, word in enumerate(words):
+        if word in REFERENCE_WORDS:
+            return len(named) <= 1 and not named.intersection(words[:position])
+    return False
+
+
+def idf(frequency: int, total_documents: int) -> float:
+    """BM25 inverse document frequency: terms in most documents weigh almost nothing"""
+    return math.log(1 + (total_documents - frequency + 0.5) / (frequency + 0.5))
+
+
+def normalize_vector(vector) -> array:
+    """L2-normalized float32 copy (a quarter of the size of a list of floats)"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return array("f", (x / norm for x in vector) if norm else vector)
+
+
+def _dot(a, b) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def embedding_scores(query, vectors: dict) -> dict:
+    """doc id -> cosine similarity to a normalized query vector"""
+    return {doc_id: _dot(query, vector) for doc_id, vector in vectors.items()}
+
+
+def term_scores(query_terms: set, context_terms: set, document_terms: dict, weights: dict) -> dict:
+    """doc id -> IDF-weighted overlap with the question, then the context"""
+    return {
+        doc_id: sum(weights.get(term, 0.0) for term in query_terms & terms)
+        + SESSION_CONTEXT_WEIGHT * sum(weights.get(term, 0.0) for term in context_terms & terms)
+        for doc_id, terms in document_terms.items()
+    }
+
+
+def coverage(query_terms: set, terms: set, weights: dict) -> float:
+    """Share of the question's IDF weight a document contains (1.0 for a question with no terms)"""
+    total = sum(weights.get(term, 0.0) for term in query_terms)
+    if not total:
+        return 1.0
+    return sum(weights.get(term, 0.0) for term in query_terms & terms) / total
+
+
+def top(scores: dict, top_k: int = 4) -> list:
+    return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+
+class Session:
+    """Recent candidates and query context for one conversation"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns = 0
+        self.last_seen = time.time()
+        self.context_vector = None  # normalized blend of recent query embeddings
+        self.context_terms = deque(maxlen=SESSION_CONTEXT_TURNS)  # content terms per question
+        # doc id -> normalized float32 embedding (None on the keyword tier);
+        # documents themselves are looked up again when needed
+        self.candidates = OrderedDict()
+        self.lock = threading.Lock()
+
+    def contextualize(self, embedding) -> array:
+        """Blend a query embedding with the conversation context"""
+        query = normalize_vector(embedding)
+        if self.context_vector is None:
+            return query
+        return normalize_vector([q + SESSION_CONTEXT_WEIGHT * c for q, c in zip(query, self.context_vector)])
+
+    def context(self, query_terms: set) -> set:
+        """Terms from recent questions that the current question doesn't already contain"""
+        return set().union(*self.context_terms) - query_terms
+
+    def record(self, query_terms: set, embedding, doc_ids: list, embeddings=None):
+        """Fold a turn's question and retrieved documents into the session"""
+        with self.lock:
+            self.turns += 1
+            self.last_seen = time.time()
+            self.context_terms.append(set(query_terms))
+            if embedding is not None:
+                self.context_vector = self.contextualize(embedding)
+
+            for doc_id, vector in zip(doc_ids, embeddings or [None] * len(doc_ids)):
+                self.candidates[doc_id] = normalize_vector(vector) if vector is not None else None
+                self.candidates.move_to_end(doc_id)
+            while len(self.candidates) > SESSION_MAX_CANDIDATES:
+                self.candidates.popitem(last=False)
+
+
+class SessionStore:
+    """TTL- and size-bounded session store, least recently used evicted first"""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.capacity = max_sessions
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.follow_ups = 0
+        self.reused = 0  # follow-ups answered from the session's documents without retrieval
+        self.candidate_hits = 0  # retrieved follow-ups answered with a document retrieval didn't return
+        self._sessions = OrderedDict()  # session id -> Session, least recently used first
+        self._lock = threading.Lock()
+
+    def get_or_create(self, session_id: str) -> Session:
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session_id] = session
+                self.created += 1
+                self._trim(self.capacity)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            return session
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def _trim(self, capacity: int):
+        while len(self._sessions) > capacity:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def shrink(self):
+        """Memory pressure: keep only a quarter of the sessions"""
+        with self._lock:
+            self.capacity = max(self.max_sessions // 4, 1)
+            self._trim(self.capacity)
+
+    def restore(self):
+        with self._lock:
+            self.capacity = self.max_sessions
+
+    def metrics(self) -> dict:
+        retrieved = self.follow_ups - self.reused
+        return {
+            "active": len(self._sessions),
+            "capacity": self.capacity,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "follow_ups": self.follow_ups,
+            "reused": self.reused,
+            "reuse_rate": round(self.reused / self.follow_ups, 3) if self.follow_ups else None,
+            "candidate_hits": self.candidate_hits,
+            "candidate_hit_rate": round(self.candidate_hits / retrieved, 3) if retrieved else None,
+        }
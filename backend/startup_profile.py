@@ -0,0 +1,87 @@
+"""
+Startup profiling for the backend
+
+Records wall time and RSS growth for each import and initialization phase
+so slow or memory-hungry startup steps show up in the logs and metrics.
+"""
+
+import time
+from contextlib import contextmanager
+
+from memory_watchdog import get_rss_mb
+
+
+class StartupProfile:
+    """Collects timing and memory for (possibly nested) startup phases"""
+
+    def __init__(self):
+        self.phases = []
+        self.finished = False
+        self._depth = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase and measure how much RSS it added"""
+        if self.finished:
+            # Runtime reloads (e.g. after memory pressure) are not startup
+            yield None
+            return
+
+        entry = {"name": name, "depth": self._depth, "seconds": None, "rss_delta_mb": None}
+        self.phases.append(entry)
+        self._depth += 1
+        rss_before = get_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = time.perf_counter() - started
+            entry["rss_mb"] = get_rss_mb()
+            entry["rss_delta_mb"] = entry["rss_mb"] - rss_before
+            self._depth -= 1
+
+    def finish(self):
+        """Stop recording once startup is complete"""
+        self.finished = True
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(p["seconds"] or 0 for p in self.phases if p["depth"] == 0)
+
+    def report(self) -> str:
+        """Human-readable table of all recorded phases"""
+        lines = [f"{'Phase':<40} {'Time (ms)':>10} {'RSS +MB':>9}"]
+        for p in self.phases:
+            name = "  " * p["depth"] + p["name"]
+            seconds = p["seconds"] if p["seconds"] is not None else 0
+            delta = p["rss_delta_mb"] if p["rss_delta_mb"] is not None else 0
+            lines.append(f"{name:<40} {seconds * 1000:>10.1f} {delta:>9.1f}")
+        lines.append(f"{'Total':<40} {self.total_seconds * 1000:>10.1f}")
+        lines.append(f"Current RSS: {get_rss_mb():.1f} MB")
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "phases": [
+                {
+                    "name": p["name"],
+                    "depth": p["depth"],
+                    "ms": round((p["seconds"] or 0) * 1000, 1),
+                    "rss_delta_mb": round(p["rss_delta_mb"] or 0, 1),
+                }
+                for p in self.phases
+            ],
+        }
+
+
+# Singleton instance
+_profile = None
+
+
+def get_startup_profile() -> StartupProfile:
+    """Get or create the startup profile singleton"""
+    global _profile
+    if _profile is None:
+        _profile = StartupProfile()
+    return _profile
@@ -0,0 +1,118 @@
+"""
+Check that the ingestion pipeline stops cleanly when a stage fails
+
+Runs the chunk and embed stages of ingest_data.py without ChromaDB or an
+embedding model and verifies that a failing stage (including a chunker
+reading a malformed JSON file) stops every stage and ends the stream
+instead of leaving the writer blocked.
+"""
+
+import json
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ingest_data import _DONE, _Stage, _batched, iter_chunks
+
+TIMEOUT = 30  # seconds before a stalled pipeline counts as hung
+
+failures = []
+
+
+def expect(condition: bool, message: str):
+    print(f"  {'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+def run_pipeline(chunk_batches, embed):
+    """Run chunker -> embedder with the main thread as writer
+
+    Returns (stages, batches written), or (stages, None) if the writer
+    didn't see the end of the stream within TIMEOUT.
+    """
+    stop = threading.Event()
+    chunk_queue = queue.Queue(maxsize=2)
+    embedded_queue = queue.Queue(maxsize=2)
+    stages = [
+        _Stage("chunker", chunk_batches, chunk_queue, stop),
+        _Stage("embedder", chunk_queue, embedded_queue, stop, work=embed),
+    ]
+    for stage in stages:
+        stage.start()
+
+    written = 0
+    deadline = time.monotonic() + TIMEOUT
+    while True:
+        try:
+            item = embedded_queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+        except queue.Empty:
+            return stages, None
+        if item is _DONE:
+            break
+        written += 1
+
+    for stage in stages:
+        stage.join(TIMEOUT)
+    return stages, written
+
+
+def failing_source():
+    """One batch, then an error while the embedder is idle waiting for more"""
+    yield ["first chunk"]
+    time.sleep(0.5)
+    raise ValueError("simulated chunker failure")
+
+
+def failing_embed(batch):
+    if batch == ["chunk 3"]:
+        raise ValueError("simulated embedder failure")
+    return batch, [[0.0]]
+
+
+def main():
+    print(f"{'='*50}")
+    print("Failing stages")
+    print(f"{'='*50}")
+
+    (chunker, embedder), written = run_pipeline(failing_source(), lambda batch: (batch, [[0.0]]))
+    expect(written == 1, "chunker failing while the embedder is idle ends the stream")
+    expect(isinstance(chunker.error, ValueError) and embedder.error is None, "the chunker's error is kept")
+    expect(not chunker.is_alive() and not embedder.is_alive(), "both stages exit")
+
+    (chunker, embedder), written = run_pipeline(([f"chunk {i}"] for i in range(10_000)), failing_embed)
+    expect(written == 3, "embedder failing mid-stream ends the stream after the batches before it")
+    expect(isinstance(embedder.error, ValueError), "the embedder's error is kept")
+    expect(not chunker.is_alive() and not embedder.is_alive(), "the chunker stops early and exits")
+
+    print(f"\n{'='*50}")
+    print("Malformed content file")
+    print(f"{'='*50}")
+
+    with tempfile.TemporaryDirectory(prefix="ingest_test_") as tmp:
+        good = Path(tmp) / "faq.json"
+        good.write_text(json.dumps({"page": "FAQ", "questions": [{"question": "Q?", "answer": "A."}]}))
+        bad = Path(tmp) / "broken.json"
+        bad.write_text(json.dumps({"page": "FAQ", "questions": [{"question": "No answer?"}]}))
+
+        (chunker, embedder), written = run_pipeline(
+            _batched(iter_chunks([good, bad], workers=1), 1), lambda batch: (batch, [[0.0]])
+        )
+        expect(written is not None, "the pipeline ends instead of hanging")
+        expect(isinstance(chunker.error, KeyError), f"the missing key is raised: {chunker.error!r}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+
+    print("\n✅ Ingestion stages stop cleanly on failure")
+
+
+if __name__ == "__main__":
+    # Guarded: iter_chunks' spawned workers re-import this module
+    main()
@@ -0,0 +1,85 @@
+"""
+Check that the sharded keyword index matches the in-process one
+
+Builds both indexes over a synthetic corpus and verifies identical search
+results and document frequencies, that a killed shard worker is respawned
+on the next query, and that a shard whose worker can't be respawned is
+scored in-process with the same results.
+"""
+
+import os
+import random
+import signal
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from keyword_index import KeywordIndex, ShardedKeywordIndex, tokenize
+
+failures = []
+
+
+def expect(condition: bool, message: str):
+    print(f"  {'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+def kill_worker(index: ShardedKeywordIndex, shard: int):
+    pid = next(iter(index._executors[shard]._processes))
+    os.kill(pid, signal.SIGKILL)
+    time.sleep(0.5)
+
+
+def main():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(2000)]
+    documents = [{"id": f"doc-{i}", "page_content": " ".join(rng.choices(words, k=30))} for i in range(6000)]
+    queries = [tokenize(" ".join(rng.choices(words, k=rng.randint(1, 6)))) for _ in range(100)]
+
+    reference = KeywordIndex(documents)
+    sharded = ShardedKeywordIndex(documents, shards=3)
+
+    def same_results() -> bool:
+        return all(
+            [doc["id"] for doc in sharded.search(query)] == [doc["id"] for doc in reference.search(query)]
+            for query in queries
+        )
+
+    print(f"{'='*50}")
+    print("Sharded vs in-process (6000 docs, 3 shards)")
+    print(f"{'='*50}")
+    expect(same_results(), "identical top-4 results for 100 queries, ties in document order")
+    tokens = ["w1", "w42", "w1999", "missing"]
+    expect(sharded.document_frequencies(tokens) == reference.document_frequencies(tokens),
+           "identical document frequencies")
+
+    print(f"\n{'='*50}")
+    print("Dead workers")
+    print(f"{'='*50}")
+    kill_worker(sharded, 1)
+    expect(same_results(), "results unchanged after a worker is killed")
+    expect(sharded.respawns == 1 and not sharded._local, "the worker was respawned")
+
+    def fail_spawn(shards):
+        raise OSError("simulated spawn failure")
+
+    sharded._spawn = fail_spawn
+    kill_worker(sharded, 0)
+    expect(same_results(), "results unchanged when a worker can't be respawned")
+    expect(list(sharded._local) == [0], "that shard is scored in-process")
+
+    sharded.close()
+
+    if failures:
+        print(f"\n❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+
+    print("\n✅ Sharded keyword index matches the in-process index")
+
+
+if __name__ == "__main__":
+    # Guarded: the shard workers are spawned and re-import this module
+    main()
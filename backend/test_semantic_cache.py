@@ -0,0 +1,117 @@
+"""
+Check the semantic retrieval cache's lookups, eviction and resizing
+
+Uses synthetic unit vectors, so no embedding model is needed: lookups hit
+at or above the cosine threshold and miss below it, the least recently
+used entry is evicted first, and shrink/restore keep the most recently
+used entries.
+"""
+
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from semantic_cache import SemanticCache
+
+DIM = 16
+
+failures = []
+
+
+def expect(condition: bool, message: str):
+    print(f"  {'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+def basis(i: int) -> list:
+    vector = [0.0] * DIM
+    vector[i] = 1.0
+    return vector
+
+
+def near(i: int, cosine: float) -> list:
+    """Unit vector at the given cosine similarity to basis(i)"""
+    vector = [0.0] * DIM
+    vector[i] = cosine
+    vector[(i + 1) % DIM] = math.sqrt(1 - cosine * cosine)
+    return vector
+
+
+def stored(cache: SemanticCache, i: int) -> bool:
+    hit = cache.lookup(basis(i))
+    return hit is not None and hit[0] == [f"doc-{i}"]
+
+
+def fill(cache: SemanticCache, indices):
+    for i in indices:
+        cache.store(basis(i), [f"doc-{i}"], {"answer": f"answer {i}"})
+
+
+print(f"{'='*50}")
+print("Threshold (0.92)")
+print(f"{'='*50}")
+
+cache = SemanticCache(capacity=4, threshold=0.92)
+expect(cache.lookup(basis(0)) is None, "empty cache misses")
+fill(cache, [0])
+hit = cache.lookup(near(0, 0.95))
+expect(hit is not None and hit[0] == ["doc-0"] and hit[1]["answer"] == "answer 0",
+       "cosine 0.95 returns the cached doc IDs and answer")
+expect(cache.lookup([x * 3 for x in near(0, 0.95)]) is not None, "query length doesn't matter")
+expect(cache.lookup(near(0, 0.90)) is None, "cosine 0.90 misses")
+expect(cache.lookup(basis(5)) is None, "unrelated query misses")
+expect(cache.lookup([1.0] * (DIM + 1)) is None, "different embedding size misses")
+metrics = cache.metrics()
+expect(metrics["hits"] == 2 and metrics["misses"] == 4, f"hits and misses counted: {metrics}")
+
+print(f"\n{'='*50}")
+print("LRU eviction (capacity 3)")
+print(f"{'='*50}")
+
+cache = SemanticCache(capacity=3, threshold=0.92)
+fill(cache, [0, 1, 2])
+stored(cache, 0)  # 1 is now least recently used
+fill(cache, [3])
+expect(not stored(cache, 1), "least recently used entry evicted")
+expect(all(stored(cache, i) for i in [0, 2, 3]), "the others kept")
+expect(cache.metrics()["evictions"] == 1 and cache.metrics()["entries"] == 3, "one eviction, still 3 entries")
+
+print(f"\n{'='*50}")
+print("Resize, shrink and restore (capacity 8)")
+print(f"{'='*50}")
+
+cache = SemanticCache(capacity=8, threshold=0.92)
+fill(cache, range(8))
+stored(cache, 2)
+stored(cache, 5)  # 2 and 5 are the most recently used
+cache.shrink()
+expect(cache.capacity == 2 and cache.metrics()["entries"] == 2, "shrink keeps a quarter of the capacity")
+expect(stored(cache, 2) and stored(cache, 5), "the most recently used entries survive")
+expect(not stored(cache, 7), "older entries dropped")
+
+cache.restore()
+fill(cache, [8, 9, 10])
+expect(cache.capacity == 8 and cache.metrics()["entries"] == 5, "restore allows full capacity again")
+expect(all(stored(cache, i) for i in [2, 5, 8, 9, 10]), "entries from before and after restore kept")
+
+cache.resize(3)
+expect(cache.metrics()["entries"] == 3 and all(stored(cache, i) for i in [8, 9, 10]),
+       "resize keeps the most recently used entries")
+
+cache = SemanticCache(capacity=3, threshold=0.92)
+fill(cache, [0])
+cache.shrink()
+fill(cache, [1])
+expect(cache.capacity == 0 and cache.lookup(basis(1)) is None, "shrinking to zero disables the cache")
+cache.restore()
+fill(cache, [1])
+expect(stored(cache, 1), "restoring after zero capacity works")
+
+if failures:
+    print(f"\n❌ {len(failures)} check(s) failed")
+    sys.exit(1)
+
+print("\n✅ Semantic cache hits, evicts and resizes as expected")
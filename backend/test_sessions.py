@@ -0,0 +1,181 @@
+"""
+Check session-aware follow-up handling on the keyword tier
+
+Runs short conversations against the default content and verifies that
+follow-ups keep the answer stateless retrieval would give, that unrelated
+questions in a session are answered exactly as without one, and that
+cached answers still serve (and seed) sessions. Follow-ups the session's
+recent documents already answer must be re-ranked without a new search and
+faster than one that searches again.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+cache_dir = tempfile.TemporaryDirectory(prefix="session_test_")
+os.environ["ENABLE_VECTOR_STORE"] = "false"
+os.environ["HUGGINGFACEHUB_API_TOKEN"] = ""
+os.environ["ANSWER_CACHE_PATH"] = str(Path(cache_dir.name) / "answers.sqlite3")
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import rag_system
+from rag_system import RAGSystem
+from session_store import Session, depends_on_context
+
+failures = []
+
+
+def expect(condition: bool, message: str):
+    print(f"  {'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+rag = RAGSystem()
+
+print(f"\n{'='*50}")
+print("Follow-up detection")
+print(f"{'='*50}")
+for question, expected in [
+    ("and how long does that take?", True),
+    ("How much does it cost?", True),
+    ("What about support?", True),
+    ("Tell me about your pricing", False),
+    ("What AI services do you offer?", False),
+    ("Does it include support?", True),
+    ("tell me more", True),
+    # FAQ questions whose reference words point within the question
+    ("How long does it take to implement an AI solution?", False),
+    ("Can you help with existing AI models that aren't performing well?", False),
+    ("What is RAG and how does it work?", False),
+]:
+    expect(depends_on_context(question) == expected,
+           f"{question!r} {'depends' if expected else 'does not depend'} on context")
+
+print(f"\n{'='*50}")
+print("Conversations")
+print(f"{'='*50}")
+
+rag.ask("What AI services do you offer?", session_id="implementation")
+result = rag.ask("and how long does that take?", session_id="implementation")
+expect(result["sources"][0] == "FAQ: How long does it take to implement an AI solution?",
+       f"follow-up keeps the implementation FAQ first: {result['sources']}")
+
+stateless = rag.ask("Tell me about your pricing")
+rag.ask("What AI services do you offer?", session_id="pricing")
+result = rag.ask("Tell me about your pricing", session_id="pricing")
+expect(result["sources"] == stateless["sources"],
+       f"unrelated question answered as without a session: {result['sources']}")
+expect("FAQ: How much does an AI project cost?" in result["sources"], "pricing question finds the cost FAQ")
+
+print(f"\n{'='*50}")
+print("Re-ranking the session's documents")
+print(f"{'='*50}")
+
+searches = 0
+search = rag.keyword_index.search
+
+
+def counted_search(*args, **kwargs):
+    global searches
+    searches += 1
+    return search(*args, **kwargs)
+
+
+rag.keyword_index.search = counted_search
+
+rag.ask("Tell me about your pricing", session_id="reuse")
+reused, searches = rag.sessions.reused, 0
+result = rag.ask("how much does that cost?", session_id="reuse")
+expect(rag.sessions.reused == reused + 1 and searches == 0,
+       f"follow-up answered from the session's documents without a search ({searches} searches)")
+expect(result["sources"][0] == "FAQ: How much does an AI project cost?",
+       f"reused documents put the cost FAQ first: {result['sources']}")
+
+rag.ask("What AI services do you offer?", session_id="gate")
+for question, source in [
+    ("and how long does that take?", "FAQ: How long does it take to implement an AI solution?"),
+    ("How much does it cost?", "FAQ: How much does an AI project cost?"),
+]:
+    reused, searches = rag.sessions.reused, 0
+    result = rag.ask(question, session_id="gate")
+    expect(rag.sessions.reused == reused and searches > 0,
+           f"{question!r} isn't answered well by the session's documents and searches again")
+    expect(result["sources"][0] == source, f"{question!r} puts {source!r} first: {result['sources']}")
+
+rag.keyword_index.search = search
+
+
+def follow_up_latency(turns: int = 200) -> float:
+    timings = []
+    for i in range(turns):
+        session_id = f"latency-{rag_system.SESSION_KEYWORD_THRESHOLD}-{i}"
+        rag.ask("Tell me about your pricing", session_id=session_id)
+        start = time.perf_counter()
+        rag.ask("how much does that cost?", session_id=session_id)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+threshold = rag_system.SESSION_KEYWORD_THRESHOLD
+reuse = follow_up_latency()
+rag_system.SESSION_KEYWORD_THRESHOLD = 1.01  # above any coverage: always search again
+full = follow_up_latency()
+rag_system.SESSION_KEYWORD_THRESHOLD = threshold
+expect(reuse < full, f"re-ranking is faster than searching again ({reuse * 1e6:.0f}µs vs {full * 1e6:.0f}µs median)")
+
+print(f"\n{'='*50}")
+print("Caches")
+print(f"{'='*50}")
+
+cache = rag.answer_cache
+hits = cache.hits
+rag.ask("Tell me about your pricing", session_id="cached")
+expect(cache.hits == hits + 1, "a cached question starting a session is served from the answer cache")
+expect(len(rag.sessions.get_or_create("cached").candidates) > 0, "the cache hit seeds the session's candidates")
+
+hits = cache.hits
+rag.ask("Tell me about your pricing", session_id="implementation")
+expect(cache.hits == hits + 1, "a standalone question later in a session still uses the answer cache")
+
+misses = cache.misses
+rag.ask("how much does that cost?", session_id="implementation")
+expect(cache.misses == misses and cache.hits == hits + 1, "follow-ups bypass the answer cache")
+
+# Vector tier without a model: count embeddings instead of computing them
+embeddings = 0
+
+
+def counted_embed(question):
+    global embeddings
+    embeddings += 1
+    return None
+
+
+rag.use_vector_store, rag.retriever, rag._embed_query = True, object(), counted_embed
+vector_version = f"{rag.content_version}:vector:{'hf' if rag.hf_api_enabled else 'extractive'}"
+cache.put(rag.collection_name, vector_version, "Tell me about your pricing", stateless)
+hits = cache.hits
+result = rag.ask("Tell me about your pricing")
+expect(cache.hits == hits + 1 and embeddings == 0, "an exact answer-cache hit is served without embedding the question")
+rag.use_vector_store, rag.retriever = False, None
+del rag._embed_query
+
+session = Session("memory")
+session.record({"pricing"}, [0.1] * 384, ["a", "b"], [[0.2] * 384, [0.3] * 384])
+expect(all(vector.itemsize == 4 and len(vector) == 384 for vector in session.candidates.values()),
+       "candidate embeddings are stored once as float32")
+
+rag.close()
+cache_dir.cleanup()
+
+if failures:
+    print(f"\n❌ {len(failures)} check(s) failed")
+    sys.exit(1)
+
+print(f"\n✅ Sessions handle follow-ups and cached answers as expected")
@@ -0,0 +1,92 @@
+"""
+Check backend import time against a budget
+
+Imports `main` in a fresh interpreter with `-X importtime`, reports the
+slowest imports, and fails if the total exceeds IMPORT_TIME_BUDGET_MS.
+Also verifies that importing `main` and starting a keyword-only deployment
+never load langchain/chromadb.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+HEAVY_MODULES = ("langchain", "langchain_community", "chromadb", "requests")
+LOADED_PREFIX = "HEAVY_MODULES_LOADED="  # marks the probe's result line in stdout
+
+backend_dir = Path(__file__).parent
+
+
+def profile_import(env_overrides: dict, init: bool = False):
+    """Import main in a subprocess
+
+    Returns (total ms for `import main`, {direct dependency: cumulative ms},
+    heavy modules loaded). With init=True the RAG system is also built.
+    """
+    env = {**os.environ, **env_overrides}
+    probe = (
+        "import sys, main; "
+        + ("main.get_rag_system(); " if init else "")
+        + f"print({LOADED_PREFIX!r} + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    )
+
+    total_ms, children, pending = 0.0, {}, {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | <indent>imported package
+        m = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)", line)
+        if not m:
+            continue
+        level = (len(m.group(3)) - 1) // 2
+        if level == 1:
+            pending[m.group(4)] = int(m.group(2)) / 1000
+        elif level == 0:
+            if m.group(4) == "main":
+                total_ms, children = int(m.group(2)) / 1000, pending
+            pending = {}
+
+    # Startup itself prints to stdout, so only parse the marked result line
+    marked = [line for line in result.stdout.splitlines() if line.startswith(LOADED_PREFIX)]
+    if not marked:
+        raise RuntimeError(f"Import probe printed no result line:\n{result.stdout}")
+    loaded = [m for m in marked[-1][len(LOADED_PREFIX):].split(",") if m]
+    return total_ms, children, loaded
+
+
+print(f"Import-time budget: {IMPORT_TIME_BUDGET_MS:.0f} ms\n")
+failed = False
+
+for label, overrides, init in [
+    ("import main", {"ENABLE_VECTOR_STORE": "true"}, False),
+    ("keyword-only startup", {"ENABLE_VECTOR_STORE": "false", "HUGGINGFACEHUB_API_TOKEN": ""}, True),
+]:
+    total_ms, children, loaded = profile_import(overrides, init)
+
+    print(f"{'='*50}")
+    print(f"Import profile: {label}")
+    print(f"{'='*50}")
+    for module, ms in sorted(children.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {module:<35} {ms:>8.1f} ms")
+    print(f"  {'Total (import main)':<35} {total_ms:>8.1f} ms")
+    print(f"  Heavy modules loaded: {', '.join(loaded) or 'none'}\n")
+
+    if total_ms > IMPORT_TIME_BUDGET_MS:
+        print(f"❌ Import time {total_ms:.0f} ms exceeds budget of {IMPORT_TIME_BUDGET_MS:.0f} ms\n")
+        failed = True
+    if loaded:
+        print(f"❌ Heavy modules loaded without being needed: {', '.join(loaded)}\n")
+        failed = True
+
+if failed:
+    sys.exit(1)
+
+print("✅ Import time within budget and heavy dependencies load lazily")
@@ -0,0 +1,173 @@
+"""
+Check the memory watchdog's degradation ladder with synthetic RSS values
+
+Feeds fixed RSS samples to a MemoryWatchdog and verifies that steps engage
+in threshold order, release only after dropping below threshold minus the
+hysteresis margin, that a step freeing a lot of memory isn't released (and
+re-engaged) as soon as it has done so, and that the keyword-only step stops
+ChromaDB's shared client system without reloads blocking the registry.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+os.environ["ENABLE_VECTOR_STORE"] = "false"
+os.environ["ANSWER_CACHE_ENABLED"] = "false"
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_watchdog import (
+    MemoryWatchdog, get_cgroup_memory_mb,
+    SHRINK_CACHES, SHED_HEAVY_WORK, KEYWORD_ONLY,
+)
+from rag_system import CollectionRegistry
+
+failures = []
+
+
+def expect(condition: bool, message: str):
+    print(f"  {'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+print(f"{'='*50}")
+print("Degradation ladder (limit 100 MB, hysteresis 5%)")
+print(f"{'='*50}")
+
+events = []
+watchdog = MemoryWatchdog(limit_mb=100, interval=0, hysteresis_pct=5, release_samples=1)
+for name, pct in [(KEYWORD_ONLY, 90), (SHRINK_CACHES, 70), (SHED_HEAVY_WORK, 80)]:
+    watchdog.add_step(name, pct,
+                      lambda name=name: events.append(("engage", name)),
+                      lambda name=name: events.append(("release", name)))
+
+watchdog.check(rss_mb=50)
+expect(events == [], "50 MB: no step engaged")
+
+watchdog.check(rss_mb=95)
+expect(events == [("engage", SHRINK_CACHES), ("engage", SHED_HEAVY_WORK), ("engage", KEYWORD_ONLY)],
+       "95 MB: all steps engaged, mildest first")
+expect(not watchdog.accepting_heavy_work(), "heavy work is shed")
+
+events.clear()
+watchdog.check(rss_mb=87)
+expect(events == [], "87 MB: keyword_only held by hysteresis (releases below 85 MB)")
+
+watchdog.check(rss_mb=84)
+expect(events == [("release", KEYWORD_ONLY)], "84 MB: keyword_only released")
+
+events.clear()
+watchdog.check(rss_mb=60)
+expect(events == [("release", SHED_HEAVY_WORK), ("release", SHRINK_CACHES)],
+       "60 MB: remaining steps released, harshest first")
+expect(watchdog.accepting_heavy_work(), "heavy work accepted again")
+expect(watchdog.peak_rss_mb == 95 and watchdog.samples == 5, "peak and sample count tracked")
+
+# A step whose action fails stays inactive and is retried on the next sample
+attempts = []
+
+
+def failing_engage():
+    attempts.append(1)
+    if len(attempts) == 1:
+        raise RuntimeError("simulated failure")
+
+
+watchdog = MemoryWatchdog(limit_mb=100, interval=0)
+watchdog.add_step(SHRINK_CACHES, 70, failing_engage, lambda: None)
+watchdog.check(rss_mb=75)
+expect(not watchdog.is_active(SHRINK_CACHES), "failed engage leaves the step inactive")
+watchdog.check(rss_mb=75)
+expect(watchdog.is_active(SHRINK_CACHES), "step engages on the next sample")
+
+print(f"\n{'='*50}")
+print("Release accounts for the memory a step freed")
+print(f"{'='*50}")
+
+# Unloading the vector store frees 30 MB; reloading it takes the 30 MB back
+memory = {"load": 95.0, "unloaded": False}
+watchdog = MemoryWatchdog(limit_mb=100, interval=0, hysteresis_pct=5, release_samples=3,
+                          sampler=lambda: memory["load"] - (30 if memory["unloaded"] else 0))
+watchdog.add_step(KEYWORD_ONLY, 90, lambda: memory.update(unloaded=True), lambda: memory.update(unloaded=False))
+
+watchdog.check()
+step = watchdog.steps[0]
+expect(step.active and step.saving_mb == 30, f"95 MB: keyword_only engaged, freeing {step.saving_mb:.0f} MB")
+for _ in range(5):
+    watchdog.check()
+expect(step.active and step.engaged_count == 1, "65 MB: held, since reloading would return to 95 MB")
+
+memory["load"] = 80.0
+watchdog.check()
+watchdog.check()
+expect(step.active, "50 MB with 80 MB reloaded: not released before 3 low samples")
+watchdog.check()
+expect(not step.active and step.released_count == 1, "released after 3 consecutive low samples")
+watchdog.check()
+expect(not step.active and step.engaged_count == 1, "80 MB after reloading: no flapping")
+
+cgroup_mb = get_cgroup_memory_mb()
+print(f"  ℹ cgroup memory: {'none' if cgroup_mb is None else f'{cgroup_mb:.1f} MB'}")
+expect(MemoryWatchdog().metrics()["source"] == ("rss" if cgroup_mb is None else "cgroup"),
+       "watchdog samples the cgroup when there is one")
+
+print(f"\n{'='*50}")
+print("Registry wiring")
+print(f"{'='*50}")
+
+registry = CollectionRegistry()
+watchdog = MemoryWatchdog(limit_mb=100, interval=0, release_samples=1)
+watchdog.add_step(SHRINK_CACHES, 70, registry.shrink_caches, registry.restore_caches)
+watchdog.add_step(KEYWORD_ONLY, 90, registry.unload_vector_stores, registry.reload_vector_stores)
+registry.get()
+
+try:
+    import chromadb
+    from chromadb.api.client import SharedSystemClient
+except ImportError:
+    chromadb = None
+    print("  ℹ chromadb not installed, skipping client system check")
+
+with tempfile.TemporaryDirectory(prefix="watchdog_chroma_") as tmp:
+    if chromadb is not None:
+        chromadb.PersistentClient(path=tmp)
+        expect(len(SharedSystemClient._identifer_to_system) > 0, "ChromaDB client system cached")
+
+    watchdog.check(rss_mb=95)
+    expect(registry.keyword_only, "95 MB: registry serves keyword-only")
+    if chromadb is not None:
+        expect(len(SharedSystemClient._identifer_to_system) == 0, "ChromaDB client system released")
+
+    watchdog.check(rss_mb=50)
+    expect(not registry.keyword_only, "50 MB: vector stores may load again")
+    expect(registry.get().ask("What AI services do you offer?")["sources"] != [],
+           "keyword retrieval still answers")
+
+# Reloading vector stores must not hold the registry lock
+rag = registry.get()
+reloading, finish = threading.Event(), threading.Event()
+rag.reload_vector_store = lambda: (reloading.set(), finish.wait(10))
+registry.keyword_only = True
+reloader = threading.Thread(target=registry.reload_vector_stores)
+reloader.start()
+reloading.wait(10)
+got = []
+getter = threading.Thread(target=lambda: got.extend([registry.get(), registry.metrics()]))
+getter.start()
+getter.join(2)
+expect(len(got) == 2, "get() and metrics() answer while a vector store reloads")
+finish.set()
+reloader.join(10)
+getter.join(10)
+
+registry.close()
+
+if failures:
+    print(f"\n❌ {len(failures)} check(s) failed")
+    sys.exit(1)
+
+print("\n✅ Memory watchdog engages and releases steps as expected")